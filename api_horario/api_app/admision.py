@@ -0,0 +1,225 @@
+# api_app/admision.py
+#
+# Control de admisión para picos de matrícula.
+#
+# - `RolThrottle` (throttle de DRF): token bucket por usuario con la tasa de su
+#   rol (ES/GC/CO) más un bucket agregado por rol, para que los estudiantes
+#   no dejen sin capacidad a coordinadores y gestores. Responde 429 + Retry-After.
+# - `LoginThrottle`: límites propios de /api/token/. Detrás del NAT del campus
+#   todos comparten IP, así que el límite fino es por nombre de usuario y el
+#   de IP es holgado.
+# - `ConcurrenciaMixin`: límite de peticiones simultáneas por clase de endpoint
+#   (`clase_admision`). Responde 503 + Retry-After antes de autenticar o tocar
+#   la base de datos.
+#
+# Los contadores viven en un backend intercambiable (ADMISION['BACKEND']):
+# `MemoriaBackend` para un solo proceso/pruebas y `CacheBackend` para compartirlos
+# entre workers a través de la caché de Django (Redis/Memcached).
+
+import math
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+CONFIGURACION_POR_DEFECTO = {
+    'BACKEND': 'api_app.admision.MemoriaBackend',
+    # rol: {'usuario': (capacidad, tokens/seg), 'rol': (capacidad, tokens/seg)}
+    'ROLES': {
+        'ES': {'usuario': (20, 2), 'rol': (2000, 400)},
+        'GC': {'usuario': (60, 10), 'rol': (500, 100)},
+        'CO': {'usuario': (60, 10), 'rol': (500, 100)},
+        None: {'usuario': (10, 1), 'rol': (200, 50)},  # anónimos, por IP
+    },
+    # /api/token/ y /api/token/refresh/: {'usuario': ..., 'ip': ...}
+    'LOGIN': {'usuario': (10, 0.2), 'ip': (500, 50)},
+    # clase_admision: peticiones simultáneas máximas por worker/cluster
+    'CONCURRENCIA': {},
+    'REINTENTO_SATURADO': 2,  # segundos sugeridos en Retry-After del 503
+}
+
+
+def configuracion():
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'ADMISION', {})}
+
+
+# === Backends ===
+class MemoriaBackend:
+    # Contadores en memoria del proceso; sustituto de un backend compartido.
+    PODA_CADA = 60  # segundos entre barridos de buckets inactivos
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # clave -> (tokens, último acceso, instante en que vuelve a estar lleno)
+        self._buckets = {}
+        self._en_curso = {}
+        self._ultima_poda = time.monotonic()
+
+    def tomar(self, clave, capacidad, tasa):
+        # Devuelve 0 si hay token; si no, segundos hasta el siguiente token
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._ultima_poda >= self.PODA_CADA:
+                self._podar(ahora)
+            tokens, ultimo, _ = self._buckets.get(clave, (capacidad, ahora, ahora))
+            tokens = min(capacidad, tokens + (ahora - ultimo) * tasa)
+            espera = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                espera = (1 - tokens) / tasa
+            self._buckets[clave] = (tokens, ahora, ahora + (capacidad - tokens) / tasa)
+            return espera
+
+    def _podar(self, ahora):
+        # Un bucket que ya se rellenó equivale a no tenerlo: sin esto cada
+        # IP o usuario visto alguna vez ocuparía memoria para siempre
+        self._buckets = {
+            clave: bucket for clave, bucket in self._buckets.items() if bucket[2] > ahora
+        }
+        self._ultima_poda = ahora
+
+    def entrar(self, clave, limite):
+        with self._lock:
+            if self._en_curso.get(clave, 0) >= limite:
+                return False
+            self._en_curso[clave] = self._en_curso.get(clave, 0) + 1
+            return True
+
+    def salir(self, clave):
+        with self._lock:
+            self._en_curso[clave] = max(0, self._en_curso.get(clave, 0) - 1)
+
+
+class CacheBackend:
+    # Compartido entre workers. Solo usa add/incr/decr, que son atómicos en
+    # Redis y Memcached: el bucket se aproxima con ventanas fijas de
+    # capacidad/tasa segundos que admiten `capacidad` peticiones cada una.
+    TTL_CONCURRENCIA = 60  # limpia contadores de workers que murieron a mitad
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def tomar(self, clave, capacidad, tasa):
+        ventana = capacidad / tasa
+        ahora = time.time()
+        inicio = math.floor(ahora / ventana) * ventana
+        clave_ventana = f'admision:tb:{clave}:{int(inicio)}'
+        self.cache.add(clave_ventana, 0, math.ceil(ventana) + 1)
+        try:
+            usadas = self.cache.incr(clave_ventana)
+        except ValueError:
+            return 0  # la clave expiró entre add e incr
+        if usadas <= capacidad:
+            return 0
+        return inicio + ventana - ahora
+
+    def entrar(self, clave, limite):
+        clave = f'admision:cc:{clave}'
+        self.cache.add(clave, 0, self.TTL_CONCURRENCIA)
+        try:
+            en_curso = self.cache.incr(clave)
+        except ValueError:
+            return True
+        if en_curso > limite:
+            self.salir(clave, prefijada=True)
+            return False
+        return True
+
+    def salir(self, clave, prefijada=False):
+        try:
+            self.cache.decr(clave if prefijada else f'admision:cc:{clave}')
+        except ValueError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def backend():
+    return import_string(configuracion()['BACKEND'])()
+
+
+# === Throttle por rol ===
+class RolThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        usuario = request.user
+        rol = getattr(usuario, 'rol', None) if usuario and usuario.is_authenticated else None
+        tasas = configuracion()['ROLES'].get(rol) or configuracion()['ROLES'][None]
+        ident = usuario.pk if rol else self.get_ident(request)
+
+        self.espera = 0
+        for nivel, clave in (('usuario', f'{rol}:{ident}'), ('rol', f'{rol}:*')):
+            if nivel not in tasas:
+                continue
+            capacidad, tasa = tasas[nivel]
+            self.espera = backend().tomar(clave, capacidad, tasa)
+            if self.espera:
+                return False
+        return True
+
+    def wait(self):
+        return math.ceil(self.espera)
+
+
+class LoginThrottle(RolThrottle):
+    def allow_request(self, request, view):
+        tasas = configuracion()['LOGIN']
+        claves = [('ip', f'login:ip:{self.get_ident(request)}')]
+        nombre = request.data.get('username') if request.method == 'POST' else None
+        if isinstance(nombre, str) and nombre:
+            claves.insert(0, ('usuario', f'login:usuario:{nombre[:150].lower()}'))
+
+        self.espera = 0
+        for nivel, clave in claves:
+            capacidad, tasa = tasas[nivel]
+            self.espera = backend().tomar(clave, capacidad, tasa)
+            if self.espera:
+                return False
+        return True
+
+
+# === Límite de concurrencia por clase de endpoint ===
+class ServicioSaturado(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "El servicio está saturado, intente de nuevo en unos segundos."
+    default_code = 'servicio_saturado'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait  # DRF lo convierte en la cabecera Retry-After
+
+
+class ConcurrenciaMixin:
+    clase_admision = None
+
+    def initial(self, request, *args, **kwargs):
+        # Antes de autenticar: rechazar no cuesta consultas a la base de datos
+        limite = configuracion()['CONCURRENCIA'].get(self.clase_admision)
+        if limite:
+            if not backend().entrar(self.clase_admision, limite):
+                raise ServicioSaturado(configuracion()['REINTENTO_SATURADO'])
+            request._admision_clase = self.clase_admision
+        super().initial(request, *args, **kwargs)
+
+    def _liberar_admision(self, request):
+        clase = getattr(request, '_admision_clase', None)
+        if clase:
+            request._admision_clase = None
+            backend().salir(clase)
+
+    def handle_exception(self, exc):
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Error no controlado (500): finalize_response no llegará a ejecutarse
+            self._liberar_admision(self.request)
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self._liberar_admision(request)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ApiAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_app'
+
+    def ready(self):
+        # Registra los receptores de señales
+        from . import signals  # noqa: F401
@@ -0,0 +1,104 @@
+# api_app/cargas.py
+#
+# Límites de carga con contadores mantenidos (CargaGestorDia, CargaEstudiante).
+#
+# En lugar de COUNT(*) + INSERT (dos pasos con carrera entre ellos), cada alta
+# reserva un cupo con un único UPDATE condicional:
+#
+#     UPDATE ... SET clases = clases + 1 WHERE gestor = %s AND dia = %s AND clases < 4
+#
+# Si no actualiza ninguna fila el límite ya se alcanzó. La reserva corre en la
+# misma transacción que el INSERT del Horario/Matricula (señales pre_save), así
+# que un fallo posterior la deshace. Las bajas liberan el cupo.
+#
+# Los límites son los del programa de la asignatura (api_app/reglas.py).
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import CargaEstudiante, CargaGestorDia, Horario, Matricula
+
+
+class LimiteExcedido(APIException):
+    # Misma forma de respuesta que las validaciones de las vistas: {"error": "..."}
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = 'limite_excedido'
+
+    def __init__(self, mensaje):
+        super().__init__({"error": mensaje})
+
+
+def _reservar(modelo, campo, limite, **clave):
+    filtro = {**clave, f'{campo}__lt': limite}
+    if modelo.objects.filter(**filtro).update(**{campo: F(campo) + 1}):
+        return True
+    # Primera reserva para esta clave: crear la fila en 0 y reintentar
+    modelo.objects.bulk_create([modelo(**clave)], ignore_conflicts=True)
+    return bool(modelo.objects.filter(**filtro).update(**{campo: F(campo) + 1}))
+
+
+def _liberar(modelo, campo, **clave):
+    modelo.objects.filter(**clave, **{f'{campo}__gt': 0}).update(**{campo: F(campo) - 1})
+
+
+# === Gestor: máximo de clases por día ===
+def reservar_clase_gestor(gestor_id, dia, limite):
+    if not _reservar(CargaGestorDia, 'clases', limite, gestor_id=gestor_id, dia=dia):
+        raise LimiteExcedido(
+            f"Un gestor no puede tener más de {limite} clases el mismo día"
+        )
+
+
+def liberar_clase_gestor(gestor_id, dia):
+    _liberar(CargaGestorDia, 'clases', gestor_id=gestor_id, dia=dia)
+
+
+# === Estudiante: máximo de asignaturas por semestre ===
+def reservar_asignatura_estudiante(estudiante_id, semestre_id, limite):
+    if not _reservar(
+        CargaEstudiante, 'asignaturas', limite,
+        estudiante_id=estudiante_id, semestre_id=semestre_id,
+    ):
+        raise LimiteExcedido(
+            f"No puedes matricularte en más de {limite} asignaturas"
+        )
+
+
+def liberar_asignatura_estudiante(estudiante_id, semestre_id):
+    _liberar(CargaEstudiante, 'asignaturas', estudiante_id=estudiante_id, semestre_id=semestre_id)
+
+
+# === Reconstrucción desde las tablas fuente ===
+def _bloquear_contadores():
+    # EXCLUSIVE deja leer pero no escribir: las reservas que lleguen esperan a
+    # que termine la reconstrucción y las que ya tocaron un contador confirman
+    # antes (el LOCK espera por ellas), así que el conteo de abajo ya las incluye.
+    if connection.vendor == 'postgresql':
+        tablas = ', '.join(connection.ops.quote_name(m._meta.db_table) for m in (CargaGestorDia, CargaEstudiante))
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {tablas} IN EXCLUSIVE MODE')
+
+
+def reconciliar_cargas():
+    # Devuelve (filas_gestor, filas_estudiante)
+    with transaction.atomic():
+        _bloquear_contadores()
+        # Contar después del LOCK: antes se perderían las altas que confirmen en medio
+        gestores = [
+            CargaGestorDia(gestor_id=fila['gestor_id'], dia=fila['dia'], clases=fila['total'])
+            for fila in Horario.objects.order_by().values('gestor_id', 'dia').annotate(total=Count('pk'))
+        ]
+        estudiantes = [
+            CargaEstudiante(
+                estudiante_id=fila['estudiante_id'], semestre_id=fila['semestre_id'],
+                asignaturas=fila['total'],
+            )
+            for fila in Matricula.objects.order_by().values('estudiante_id', 'semestre_id').annotate(total=Count('pk'))
+        ]
+        CargaGestorDia.objects.all().delete()
+        CargaGestorDia.objects.bulk_create(gestores, batch_size=1000)
+        CargaEstudiante.objects.all().delete()
+        CargaEstudiante.objects.bulk_create(estudiantes, batch_size=1000)
+    return len(gestores), len(estudiantes)
@@ -0,0 +1,182 @@
+# api_app/catalogo.py
+#
+# Catálogo offline para la app móvil.
+#
+# - Snapshot: Programa, Asignatura, Salon y Horario completos en un único JSON
+#   gzip precomprimido en disco (catalogo-<version>.json.gz). Se regenera cuando
+#   hay cambios nuevos, como mucho cada CATALOGO_SNAPSHOT_INTERVALO segundos, o
+#   con el comando `generar_snapshot_catalogo`.
+# - Delta: CambioCatalogo, alimentado por señales, permite devolver solo lo
+#   insertado/actualizado/eliminado desde una versión dada.
+#
+# Un cliente que ya leyó la versión N no vuelve a pedir nada <= N, así que los
+# ids de CambioCatalogo deben hacerse visibles en orden. Cada cambio se anota
+# al confirmarse la transacción que lo hizo, en una transacción propia que en
+# Postgres toma un candado consultivo hasta su COMMIT (SQLite ya serializa las
+# escrituras): un id solo se asigna cuando el anterior ya está confirmado.
+#
+# El registro se compacta (`compactar_cambios`) por debajo del snapshot
+# vigente; a quien pida cambios desde antes de lo que queda se le responde 410
+# para que descargue el snapshot.
+
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Asignatura, CambioCatalogo, Horario, Programa, Salon
+from .serializers import (
+    AsignaturaSerializer, HorarioSerializer, ProgramaSerializer, SalonSerializer,
+)
+
+# modelo -> (clave en el JSON, queryset, serializer)
+FUENTES = {
+    'programa': ('programas', lambda: Programa.objects.order_by('pk'), ProgramaSerializer),
+    'asignatura': ('asignaturas', lambda: Asignatura.objects.prefetch_related('gestores').order_by('pk'), AsignaturaSerializer),
+    'salon': ('salones', lambda: Salon.objects.order_by('pk'), SalonSerializer),
+    'horario': ('horarios', lambda: Horario.objects.order_by('pk'), HorarioSerializer),
+}
+MODELOS = {Programa: 'programa', Asignatura: 'asignatura', Salon: 'salon', Horario: 'horario'}
+CANDADO_CAMBIOS = 7203  # clave de pg_advisory_xact_lock
+
+
+def registrar_cambio(instance, operacion):
+    # El pk se toma ya: tras un borrado Django lo pone en None
+    modelo, objeto_id = MODELOS[type(instance)], instance.pk
+    transaction.on_commit(lambda: _anotar(modelo, objeto_id, operacion))
+
+
+def _anotar(modelo, objeto_id, operacion):
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CANDADO_CAMBIOS])
+        CambioCatalogo.objects.create(modelo=modelo, objeto_id=objeto_id, operacion=operacion)
+
+
+def version_actual():
+    return CambioCatalogo.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def version_minima():
+    # Versión más antigua desde la que todavía se pueden pedir cambios
+    primera = CambioCatalogo.objects.order_by('pk').values_list('pk', flat=True).first()
+    return primera - 1 if primera else 0
+
+
+# === Snapshot completo ===
+def _directorio():
+    directorio = Path(getattr(settings, 'CATALOGO_SNAPSHOT_DIR', Path(tempfile.gettempdir()) / 'catalogo'))
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _snapshots():
+    # [(version, ruta)] de los snapshots en disco, del más antiguo al más reciente
+    snapshots = []
+    for ruta in _directorio().glob('catalogo-*.json.gz'):
+        try:
+            snapshots.append((int(ruta.name.split('-')[1].split('.')[0]), ruta))
+        except ValueError:
+            continue
+    return sorted(snapshots)
+
+
+def _ultimo_snapshot():
+    # (version, ruta) del snapshot más reciente en disco, o (None, None)
+    snapshots = _snapshots()
+    return snapshots[-1] if snapshots else (None, None)
+
+
+def generar_snapshot():
+    # La versión se lee antes que los datos: si algo cambia entretanto, el
+    # cliente lo recibe de nuevo en el delta y lo aplica de forma idempotente.
+    version = version_actual()
+    datos = {'version': version}
+    for clave, queryset, serializer in FUENTES.values():
+        datos[clave] = serializer(queryset(), many=True).data
+
+    directorio = _directorio()
+    destino = directorio / f'catalogo-{version}.json.gz'
+    with tempfile.NamedTemporaryFile(dir=directorio, delete=False, suffix='.tmp') as tmp:
+        tmp.write(gzip.compress(json.dumps(datos, cls=JSONEncoder).encode(), compresslevel=9))
+    os.replace(tmp.name, destino)
+
+    # Se conservan el nuevo y el anterior: una petición que acaba de elegir el
+    # anterior todavía puede abrirlo
+    for _, ruta in _snapshots()[:-2]:
+        if ruta != destino:
+            ruta.unlink(missing_ok=True)
+    return version, destino
+
+
+def snapshot_vigente():
+    # Devuelve (version, ruta), regenerando si hay cambios y el actual ya tiene
+    # más de CATALOGO_SNAPSHOT_INTERVALO segundos (evita regenerar en ráfagas).
+    version, ruta = _ultimo_snapshot()
+    if ruta is None:
+        return generar_snapshot()
+    intervalo = getattr(settings, 'CATALOGO_SNAPSHOT_INTERVALO', 60)
+    if time.time() - ruta.stat().st_mtime >= intervalo and version_actual() > version:
+        return generar_snapshot()
+    return version, ruta
+
+
+# === Cambios incrementales ===
+def compactar_cambios(retencion_dias):
+    # Borra los cambios de más de `retencion_dias` que ya están en el snapshot
+    # vigente: quien los necesite puede descargarlo. Devuelve cuántos borró.
+    version, _ = _ultimo_snapshot()
+    if not version:
+        return 0
+    antiguos = CambioCatalogo.objects.filter(
+        pk__lt=version, fecha__lt=timezone.now() - timedelta(days=retencion_dias)
+    )
+    return antiguos.delete()[0]
+
+
+def cambios_desde(desde):
+    cambios = CambioCatalogo.objects.filter(pk__gt=desde).order_by('pk').values_list(
+        'pk', 'modelo', 'objeto_id', 'operacion'
+    )
+    version = desde
+    primero, ultimo = {}, {}
+    for pk, modelo, objeto_id, operacion in cambios.iterator():
+        version = pk
+        primero.setdefault((modelo, objeto_id), operacion)
+        ultimo[(modelo, objeto_id)] = operacion
+
+    respuesta = {
+        'version': version,
+        'insertados': {clave: [] for clave, _, _ in FUENTES.values()},
+        'actualizados': {clave: [] for clave, _, _ in FUENTES.values()},
+        'eliminados': {clave: [] for clave, _, _ in FUENTES.values()},
+    }
+    vivos = {modelo: {} for modelo in FUENTES}
+    for (modelo, objeto_id), operacion in ultimo.items():
+        clave = FUENTES[modelo][0]
+        if operacion == 'D':
+            # Siempre, aunque se haya creado dentro de la ventana: el cambio se
+            # anota al confirmar, así que un snapshot de versión `desde` puede
+            # traer ya la fila. Borrar un id desconocido no le hace nada al cliente.
+            respuesta['eliminados'][clave].append(objeto_id)
+        else:
+            grupo = 'insertados' if primero[(modelo, objeto_id)] == 'I' else 'actualizados'
+            vivos[modelo][objeto_id] = grupo
+
+    # Una consulta por modelo para las filas vigentes
+    for modelo, ids in vivos.items():
+        if not ids:
+            continue
+        clave, queryset, serializer = FUENTES[modelo]
+        for fila in serializer(queryset().filter(pk__in=ids), many=True).data:
+            respuesta[ids[fila['id']]][clave].append(fila)
+    return respuesta
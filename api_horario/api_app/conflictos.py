@@ -0,0 +1,189 @@
+# api_app/conflictos.py
+#
+# Reporte de conflictos de matrícula de todo un semestre (comando
+# reporte_conflictos). Un estudiante entra al reporte si sus asignaturas tienen
+# clases que se solapan, más de MAX_CLASES_ESTUDIANTE_DIA clases un mismo día o
+# más de MAX_ASIGNATURAS_ESTUDIANTE asignaturas. Los límites son las reglas de
+# cada programa (api_app/reglas.py); a quien cursa varios se le aplica el más
+# permisivo. La columna `programas` deja ver los casos que cruzan programas.
+#
+# Cada asignatura se precalcula una sola vez como:
+# - un bitset de su semana, un bit por minuto (1440 por día, los cinco días
+#   seguidos): dos asignaturas chocan si `a & b` no es cero, así que revisar a
+#   un estudiante cuesta un AND y un OR por asignatura;
+# - sus clases por día empaquetadas en campos de 8 bits de un entero: una suma
+#   acumula los cinco días a la vez.
+# Solo los estudiantes con algún choque se desglosan por día y por pares.
+#
+# Los estudiantes se recorren una vez, ordenados por id y en lotes de rangos de
+# id independientes entre sí, que pueden repartirse entre procesos.
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+
+import django
+from django.db import connections
+from django.utils import timezone
+
+from . import reglas
+from .models import Asignatura, ConflictoMatricula, Horario, Matricula, ReporteConflictos, Semestre
+
+MINUTOS_DIA = 1440
+BITS_CONTEO = 8
+MASCARA_CONTEO = (1 << BITS_CONTEO) - 1
+DIAS = [codigo for codigo, _ in Horario.DIAS_SEMANA]
+_MASCARA_DIA = [((1 << MINUTOS_DIA) - 1) << (d * MINUTOS_DIA) for d in range(len(DIAS))]
+
+# Índice y límites por programa del proceso actual (ver _iniciar_proceso)
+_estado = {}
+
+
+def _minuto(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def indice_asignaturas():
+    # asignatura_id -> (bitset semanal, clases por día empaquetadas, programa_id)
+    indice = {pk: [0, 0, programa_id] for pk, programa_id in Asignatura.objects.values_list('pk', 'programa_id')}
+    horarios = Horario.objects.values_list('asignatura_id', 'dia', 'hora_inicio', 'hora_fin')
+    for asignatura_id, dia, inicio, fin in horarios.iterator(chunk_size=5000):
+        d = DIAS.index(dia)
+        desde = d * MINUTOS_DIA + _minuto(inicio)
+        hasta = d * MINUTOS_DIA + _minuto(fin)
+        entrada = indice[asignatura_id]
+        if hasta > desde:
+            entrada[0] |= ((1 << (hasta - desde)) - 1) << desde
+        entrada[1] += 1 << (d * BITS_CONTEO)
+    return {pk: tuple(entrada) for pk, entrada in indice.items()}
+
+
+def revisar_estudiante(asignaturas, indice, max_dia, max_total):
+    # Devuelve [(tipo, dia, asignaturas implicadas)] para un estudiante
+    ocupado = clases = 0
+    choque = False
+    for asignatura in asignaturas:
+        bits, conteo, _ = indice[asignatura]
+        choque = choque or bool(ocupado & bits)
+        ocupado |= bits
+        clases += conteo
+
+    conflictos = []
+    if choque:
+        for d, dia in enumerate(DIAS):
+            del_dia = [(a, indice[a][0] & _MASCARA_DIA[d]) for a in asignaturas]
+            del_dia = [(a, bits) for a, bits in del_dia if bits]
+            for i, (a, bits_a) in enumerate(del_dia):
+                for b, bits_b in del_dia[i + 1:]:
+                    if bits_a & bits_b:
+                        conflictos.append(('CHO', dia, [a, b]))
+    for d, dia in enumerate(DIAS):
+        if (clases >> (d * BITS_CONTEO)) & MASCARA_CONTEO > max_dia:
+            conflictos.append((
+                'DIA', dia,
+                [a for a in asignaturas if (indice[a][1] >> (d * BITS_CONTEO)) & MASCARA_CONTEO],
+            ))
+    if len(asignaturas) > max_total:
+        conflictos.append(('TOT', '', list(asignaturas)))
+    return conflictos
+
+
+def _iniciar_proceso(indice, limites):
+    # Con spawn el proceso hijo arranca sin Django; con fork esto no hace nada
+    django.setup()
+    _estado['indice'] = indice
+    _estado['limites'] = limites
+
+
+def revisar_lote(semestre, desde, hasta):
+    # Estudiantes con id en [desde, hasta]. Devuelve (revisados, conflictos)
+    indice = _estado['indice']
+    limites = _estado['limites']
+    filas = Matricula.objects.del_semestre(semestre).filter(
+        estudiante_id__gte=desde, estudiante_id__lte=hasta
+    ).order_by('estudiante_id', 'asignatura_id').values_list('estudiante_id', 'asignatura_id')
+
+    revisados = 0
+    conflictos = []
+    for estudiante_id, grupo in groupby(filas.iterator(chunk_size=5000), key=itemgetter(0)):
+        revisados += 1
+        asignaturas = [a for _, a in grupo]
+        programas = {indice[a][2] for a in asignaturas}
+        max_dia = max(limites[p][0] for p in programas)
+        max_total = max(limites[p][1] for p in programas)
+        encontrados = revisar_estudiante(asignaturas, indice, max_dia, max_total)
+        if encontrados:
+            conflictos.extend(
+                (estudiante_id, tipo, dia, implicadas, len(programas)) for tipo, dia, implicadas in encontrados
+            )
+    return revisados, conflictos
+
+
+def rangos_estudiantes(semestre, tamano):
+    # [(primer id, último id)] con `tamano` estudiantes matriculados cada uno
+    ids = list(
+        Matricula.objects.del_semestre(semestre).order_by('estudiante_id')
+        .values_list('estudiante_id', flat=True).distinct()
+    )
+    return [(ids[i], ids[min(i + tamano, len(ids)) - 1]) for i in range(0, len(ids), tamano)]
+
+
+def _guardar(reporte, resultados):
+    revisados = con_conflictos = 0
+    for cantidad, conflictos in resultados:
+        revisados += cantidad
+        # Los lotes no comparten estudiantes: basta contar dentro de cada uno
+        con_conflictos += len({fila[0] for fila in conflictos})
+        ConflictoMatricula.objects.bulk_create(
+            [
+                ConflictoMatricula(
+                    reporte=reporte, estudiante_id=estudiante_id, tipo=tipo, dia=dia,
+                    asignaturas=asignaturas, programas=programas,
+                )
+                for estudiante_id, tipo, dia, asignaturas, programas in conflictos
+            ],
+            batch_size=2000,
+        )
+        ReporteConflictos.objects.filter(pk=reporte.pk).update(estudiantes=revisados)
+    return revisados, con_conflictos
+
+
+def generar_reporte(semestre=None, procesos=1, tamano_lote=2000):
+    semestre = semestre or Semestre.codigo_actual()
+    if not semestre:
+        raise ValueError("No hay semestre actual configurado.")
+    reporte = ReporteConflictos.objects.create(semestre=semestre)
+    inicio = time.monotonic()
+    try:
+        indice = indice_asignaturas()
+        limites = {
+            programa_id: (p['MAX_CLASES_ESTUDIANTE_DIA'], p['MAX_ASIGNATURAS_ESTUDIANTE'])
+            for programa_id, p in reglas.parametros_de({entrada[2] for entrada in indice.values()}).items()
+        }
+        rangos = rangos_estudiantes(semestre, tamano_lote)
+        desdes = [desde for desde, _ in rangos]
+        hastas = [hasta for _, hasta in rangos]
+        if procesos > 1:
+            # Cada proceso abre su propia conexión; no deben heredar la del padre
+            connections.close_all()
+            with ProcessPoolExecutor(procesos, initializer=_iniciar_proceso, initargs=(indice, limites)) as ejecutor:
+                revisados, con_conflictos = _guardar(
+                    reporte, ejecutor.map(partial(revisar_lote, semestre), desdes, hastas)
+                )
+        else:
+            _iniciar_proceso(indice, limites)
+            revisados, con_conflictos = _guardar(
+                reporte, (revisar_lote(semestre, desde, hasta) for desde, hasta in rangos)
+            )
+    except BaseException:
+        ReporteConflictos.objects.filter(pk=reporte.pk).update(estado='F', terminado=timezone.now())
+        raise
+
+    ReporteConflictos.objects.filter(pk=reporte.pk).update(
+        estado='C', terminado=timezone.now(), estudiantes=revisados,
+        con_conflictos=con_conflictos, segundos=round(time.monotonic() - inicio, 3),
+    )
+    reporte.refresh_from_db()
+    return reporte
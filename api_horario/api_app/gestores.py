@@ -0,0 +1,80 @@
+# api_app/gestores.py
+#
+# Horario semanal del gestor con número de matriculados por clase, en caché.
+#
+# Invalidación:
+# - Escritura de Horario: se borra la entrada de su gestor (y la del anterior
+#   si la clase cambió de gestor).
+# - Escritura de Matricula: solo se incrementa la versión de su asignatura
+#   (una operación de caché, sin consultas en el pico de matrícula). Cada
+#   entrada recuerda la versión de sus asignaturas al construirse y se
+#   reconstruye si alguna cambió.
+#
+# Las versiones se incrementan al confirmar la transacción (señales con
+# on_commit) y se leen ANTES de consultar: una matrícula que confirme durante
+# la construcción deja la entrada con una versión vieja y la siguiente lectura
+# la reconstruye. Las entradas se construyen siempre desde la primaria: con una
+# réplica atrasada quedaría en caché un conteo viejo bajo la versión nueva.
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Horario, Semestre
+
+TTL = 300
+
+
+def _clave_gestor(gestor_id):
+    return f'horario_gestor:{gestor_id}'
+
+
+def _clave_asignatura(asignatura_id):
+    return f'horario_gestor:asignatura:{asignatura_id}'
+
+
+def invalidar_gestor(gestor_id):
+    cache.delete(_clave_gestor(gestor_id))
+
+
+def asignatura_modificada(asignatura_id):
+    clave = _clave_asignatura(asignatura_id)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, 1, None)
+
+
+def horarios_con_matriculados(gestor_id):
+    semestre = Semestre.codigo_actual()
+    filtro = Q(asignatura__matricula__semestre_id=semestre) if semestre else None
+    return (
+        Horario.objects.filter(gestor_id=gestor_id)
+        .select_related('asignatura', 'salon')
+        .annotate(matriculados=Count('asignatura__matricula', filter=filtro))
+    )
+
+
+def horario_gestor(gestor_id, construir):
+    # `construir(queryset)` serializa; el resultado se cachea junto con las
+    # versiones de las asignaturas que contiene.
+    entrada = cache.get(_clave_gestor(gestor_id))
+    if entrada is not None:
+        claves = [_clave_asignatura(a) for a in entrada['versiones']]
+        actuales = cache.get_many(claves)
+        if all(actuales.get(_clave_asignatura(a), 0) == v for a, v in entrada['versiones'].items()):
+            return entrada['datos']
+
+    # Versiones primero, conteos después (ver arriba)
+    previas = set(
+        Horario.objects.using('default').filter(gestor_id=gestor_id).values_list('asignatura_id', flat=True)
+    )
+    actuales = cache.get_many([_clave_asignatura(a) for a in previas])
+    versiones = {a: actuales.get(_clave_asignatura(a), 0) for a in previas}
+    horarios = list(horarios_con_matriculados(gestor_id).using('default'))
+    for horario in horarios:
+        # Asignatura que apareció entre las dos consultas: versión desconocida,
+        # la entrada no se reutiliza
+        versiones.setdefault(horario.asignatura_id, None)
+    entrada = {'versiones': versiones, 'datos': construir(horarios)}
+    cache.set(_clave_gestor(gestor_id), entrada, TTL)
+    return entrada['datos']
@@ -0,0 +1,150 @@
+# api_app/idempotencia.py
+#
+# Soporte de la cabecera Idempotency-Key en endpoints de creación.
+#
+# El primer POST con una clave la reclama (INSERT con unique(usuario, clave)),
+# se ejecuta normalmente y guarda su respuesta. Los reintentos con la misma
+# clave dentro de IDEMPOTENCIA_TTL segundos reciben esa respuesta sin volver a
+# ejecutar nada (cabecera Idempotent-Replayed: true). Un duplicado que llega
+# mientras el original sigue en curso espera a que termine.
+#
+# Las respuestas 5xx no se guardan: la clave se libera para poder reintentar.
+# Las claves expiradas se borran con `purgar_expiradas` (comando
+# purgar_idempotencia, pensado para un cron).
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+
+CABECERA = 'Idempotency-Key'
+
+
+class ClaveReutilizada(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "La Idempotency-Key ya se usó con otra petición."
+    default_code = 'clave_reutilizada'
+
+
+class PeticionEnCurso(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Una petición con la misma Idempotency-Key sigue en curso."
+    default_code = 'peticion_en_curso'
+
+
+class _Repeticion(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def _respuesta_guardada(registro):
+    response = Response(registro.respuesta, status=registro.codigo_respuesta)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCIA_TTL', 24 * 3600))
+
+
+def purgar_expiradas(tamano_lote=5000):
+    # Borra por lotes las claves con más de IDEMPOTENCIA_TTL (ya no se
+    # reproducen); lotes cortos para no bloquear la tabla. Devuelve cuántas.
+    limite = timezone.now() - _ttl()
+    borradas = 0
+    while True:
+        lote = list(
+            ClaveIdempotencia.objects.filter(creada__lt=limite)
+            .values_list('pk', flat=True)[:tamano_lote]
+        )
+        if not lote:
+            return borradas
+        borradas += ClaveIdempotencia.objects.filter(pk__in=lote).delete()[0]
+
+
+def _reclamar(usuario, clave, ruta, huella):
+    # Devuelve el registro reclamado, o lanza _Repeticion con la respuesta guardada
+    ttl = _ttl()
+    espera_maxima = getattr(settings, 'IDEMPOTENCIA_ESPERA', 10)
+    abandono = timedelta(seconds=getattr(settings, 'IDEMPOTENCIA_ABANDONO', 120))
+    inicio = time.monotonic()
+    while True:
+        try:
+            with transaction.atomic():
+                return ClaveIdempotencia.objects.create(
+                    usuario=usuario, clave=clave, ruta=ruta, huella=huella
+                )
+        except IntegrityError:
+            pass
+
+        registro = ClaveIdempotencia.objects.filter(usuario=usuario, clave=clave).first()
+        if registro is None:
+            continue  # se liberó entre el INSERT y la lectura
+        antiguedad = timezone.now() - registro.creada
+        # Expirada, o en curso desde hace tanto que el worker debió morir
+        if antiguedad > ttl or (registro.estado == 'P' and antiguedad > abandono):
+            registro.delete()
+            continue
+        if registro.ruta != ruta or registro.huella != huella:
+            raise ClaveReutilizada()
+        if registro.estado == 'C':
+            raise _Repeticion(_respuesta_guardada(registro))
+        if time.monotonic() - inicio >= espera_maxima:
+            raise PeticionEnCurso()
+        time.sleep(0.1)
+
+
+class IdempotenciaMixin:
+    # Para ViewSets con endpoints POST de creación
+    def initial(self, request, *args, **kwargs):
+        self._clave_idempotencia = None
+        super().initial(request, *args, **kwargs)
+        clave = request.headers.get(CABECERA)
+        if request.method != 'POST' or not clave or not request.user.is_authenticated:
+            return
+        try:
+            cuerpo = request.body
+        except RawPostDataException:
+            # Algún permiso ya leyó request.data
+            cuerpo = json.dumps(request.data, sort_keys=True, default=str).encode()
+        huella = hashlib.sha256(cuerpo).hexdigest()
+        self._clave_idempotencia = _reclamar(request.user, clave[:255], request.path[:255], huella)
+
+    def _liberar_clave(self):
+        registro = getattr(self, '_clave_idempotencia', None)
+        self._clave_idempotencia = None
+        if registro is not None:
+            registro.delete()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _Repeticion):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Error no controlado (500): finalize_response no llegará a ejecutarse
+            self._liberar_clave()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        registro = getattr(self, '_clave_idempotencia', None)
+        if registro is not None:
+            if response.status_code >= 500 or not hasattr(response, 'data'):
+                self._liberar_clave()
+            else:
+                self._clave_idempotencia = None
+                registro.estado = 'C'
+                registro.codigo_respuesta = response.status_code
+                registro.respuesta = response.data
+                registro.save(update_fields=['estado', 'codigo_respuesta', 'respuesta'])
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api_app.models import Matricula, MatriculaHistorica, Semestre
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve las matrículas de semestres cerrados a MatriculaHistorica para "
+        "que las consultas del semestre actual no recorran el histórico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'codigos', nargs='*',
+            help="Códigos de semestre a archivar (p. ej. 2024-2).",
+        )
+        parser.add_argument(
+            '--anteriores', action='store_true',
+            help="Archiva todos los semestres no actuales que sigan abiertos.",
+        )
+        parser.add_argument('--lote', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['anteriores']:
+            semestres = list(Semestre.objects.filter(actual=False, cerrado=False))
+        elif options['codigos']:
+            semestres = list(Semestre.objects.filter(codigo__in=options['codigos']))
+            faltantes = set(options['codigos']) - {s.codigo for s in semestres}
+            if faltantes:
+                raise CommandError(f"Semestres inexistentes: {', '.join(sorted(faltantes))}")
+        else:
+            raise CommandError("Indique códigos de semestre o use --anteriores.")
+
+        for semestre in semestres:
+            if semestre.actual:
+                raise CommandError(f"No se puede archivar el semestre actual ({semestre}).")
+            movidas = self.archivar(semestre, options['lote'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{semestre}: {movidas} matrículas archivadas."
+            ))
+
+    def archivar(self, semestre, tamano_lote):
+        # Lotes en transacciones cortas para no bloquear Matricula mucho tiempo
+        movidas = 0
+        while True:
+            with transaction.atomic():
+                lote = list(
+                    Matricula.objects.del_semestre(semestre.codigo)
+                    .order_by('pk')
+                    .select_for_update()
+                    .values('pk', 'estudiante_id', 'asignatura_id')[:tamano_lote]
+                )
+                if not lote:
+                    break
+                MatriculaHistorica.objects.bulk_create(
+                    [
+                        MatriculaHistorica(
+                            matricula_id=fila['pk'],
+                            estudiante_id=fila['estudiante_id'],
+                            asignatura_id=fila['asignatura_id'],
+                            semestre_id=semestre.codigo,
+                        )
+                        for fila in lote
+                    ],
+                    ignore_conflicts=True,
+                )
+                Matricula.objects.filter(pk__in=[fila['pk'] for fila in lote]).delete()
+                movidas += len(lote)
+
+        semestre.cerrado = True
+        semestre.save(update_fields=['cerrado'])
+        return movidas
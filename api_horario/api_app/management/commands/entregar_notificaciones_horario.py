@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api_app.notificaciones import entregar_cambios_horario
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrega las notificaciones pendientes por cambios de horario, "
+        "agrupando todos los cambios en una notificación por estudiante. "
+        "Pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ventana', type=int, default=None,
+            help="Segundos sin cambios nuevos antes de entregar.",
+        )
+        parser.add_argument(
+            '--forzar', action='store_true',
+            help="Entrega aunque la ráfaga de cambios siga en curso.",
+        )
+
+    def handle(self, *args, **options):
+        notificaciones, destinatarios = entregar_cambios_horario(
+            ventana=options['ventana'], forzar=options['forzar'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{notificaciones} notificaciones entregadas a {destinatarios} estudiantes."
+        ))
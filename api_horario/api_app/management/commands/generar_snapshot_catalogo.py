@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api_app.catalogo import compactar_cambios, generar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera el snapshot comprimido del catálogo para la app móvil y "
+        "compacta el registro de cambios que ya quedó incluido en él."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retencion-dias', type=int, default=None,
+            help="Días de cambios que se conservan (por defecto CATALOGO_RETENCION_CAMBIOS).",
+        )
+
+    def handle(self, *args, **options):
+        version, ruta = generar_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot v{version} generado en {ruta} ({ruta.stat().st_size} bytes)."
+        ))
+        retencion = options['retencion_dias']
+        if retencion is None:
+            retencion = getattr(settings, 'CATALOGO_RETENCION_CAMBIOS', 30)
+        borrados = compactar_cambios(retencion)
+        self.stdout.write(f"{borrados} cambios del catálogo compactados.")
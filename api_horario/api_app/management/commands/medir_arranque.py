@@ -0,0 +1,171 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Se ejecuta en un proceso nuevo para medir un arranque en frío real
+SCRIPT_WSGI = '''
+import json, sys, time
+inicio = time.perf_counter()
+from {modulo} import application
+importado = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+
+def peticion():
+    entorno = {{}}
+    setup_testing_defaults(entorno)
+    entorno['PATH_INFO'] = {ruta!r}
+    estado = []
+    b''.join(application(entorno, lambda s, h, exc_info=None: estado.append(s)))
+    return estado[0]
+
+estado = peticion()
+primera = time.perf_counter()
+peticion()
+segunda = time.perf_counter()
+print(json.dumps({{
+    'estado': estado,
+    'importacion': importado - inicio,
+    'primera_peticion': primera - importado,
+    'segunda_peticion': segunda - primera,
+    'hasta_primera_respuesta': primera - inicio,
+}}))
+'''
+
+SCRIPT_ASGI = '''
+import asyncio, json, time
+inicio = time.perf_counter()
+from {modulo} import application
+importado = time.perf_counter()
+
+async def peticion():
+    mensajes = []
+    alcance = {{
+        'type': 'http', 'asgi': {{'version': '3.0'}}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': {ruta!r}, 'raw_path': {ruta!r}.encode(),
+        'root_path': '', 'query_string': b'', 'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 5000),
+    }}
+
+    entregado = []
+
+    async def recibir():
+        if entregado:
+            # Sin desconexión: Django cancela esta espera al terminar la respuesta
+            await asyncio.Future()
+        entregado.append(True)
+        return {{'type': 'http.request', 'body': b'', 'more_body': False}}
+
+    async def enviar(mensaje):
+        mensajes.append(mensaje)
+
+    await application(alcance, recibir, enviar)
+    return str(mensajes[0]['status'])
+
+async def principal():
+    estado = await peticion()
+    primera = time.perf_counter()
+    await peticion()
+    segunda = time.perf_counter()
+    return estado, primera, segunda
+
+estado, primera, segunda = asyncio.run(principal())
+print(json.dumps({{
+    'estado': estado,
+    'importacion': importado - inicio,
+    'primera_peticion': primera - importado,
+    'segunda_peticion': segunda - primera,
+    'hasta_primera_respuesta': primera - inicio,
+}}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el arranque en frío de un worker: perfil de tiempos de importación "
+        "(python -X importtime) y tiempo hasta la primera respuesta de "
+        "wsgi.py/asgi.py. Falla si la mediana supera ARRANQUE_PRESUPUESTO_MS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servidor', choices=['wsgi', 'asgi', 'ambos'], default='ambos')
+        parser.add_argument('--ruta', default='/api/', help="Ruta de la primera petición.")
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--perfil', type=int, default=15, metavar='N',
+                            help="Paquetes más costosos a mostrar (0 para omitir).")
+        parser.add_argument('--presupuesto-ms', type=float, default=None)
+
+    def entorno(self, metricas_dir):
+        entorno = dict(os.environ)
+        entorno.setdefault('DJANGO_SETTINGS_MODULE', 'api_horario.settings')
+        # Que las mediciones no ensucien las métricas reales
+        entorno['METRICAS_DIR'] = metricas_dir
+        return entorno
+
+    def ejecutar(self, argumentos):
+        with tempfile.TemporaryDirectory(prefix='medir_arranque_') as metricas_dir:
+            resultado = subprocess.run(
+                [sys.executable, *argumentos], cwd=settings.BASE_DIR, env=self.entorno(metricas_dir),
+                capture_output=True, text=True,
+            )
+        if resultado.returncode != 0:
+            raise CommandError(resultado.stderr[-2000:])
+        return resultado
+
+    def handle(self, *args, **options):
+        if options['perfil']:
+            self.perfil(options['perfil'])
+
+        presupuesto = options['presupuesto_ms'] or getattr(settings, 'ARRANQUE_PRESUPUESTO_MS', 1500)
+        servidores = ['wsgi', 'asgi'] if options['servidor'] == 'ambos' else [options['servidor']]
+        excedidos = []
+        for servidor in servidores:
+            plantilla = SCRIPT_WSGI if servidor == 'wsgi' else SCRIPT_ASGI
+            script = plantilla.format(modulo=f'api_horario.{servidor}', ruta=options['ruta'])
+            medidas = [
+                json.loads(self.ejecutar(['-c', script]).stdout.strip().splitlines()[-1])
+                for _ in range(options['repeticiones'])
+            ]
+            mediana = {
+                clave: statistics.median(m[clave] for m in medidas) * 1000
+                for clave in ('importacion', 'primera_peticion', 'segunda_peticion', 'hasta_primera_respuesta')
+            }
+            self.stdout.write(
+                f"{servidor}: estado {medidas[0]['estado']} | importación {mediana['importacion']:.0f} ms"
+                f" | primera petición {mediana['primera_peticion']:.0f} ms"
+                f" | segunda {mediana['segunda_peticion']:.1f} ms"
+                f" | hasta primera respuesta {mediana['hasta_primera_respuesta']:.0f} ms"
+                f" (mediana de {len(medidas)})"
+            )
+            if mediana['hasta_primera_respuesta'] > presupuesto:
+                excedidos.append(f"{servidor}: {mediana['hasta_primera_respuesta']:.0f} ms > {presupuesto:.0f} ms")
+
+        if excedidos:
+            raise CommandError("Arranque fuera de presupuesto: " + "; ".join(excedidos))
+        self.stdout.write(self.style.SUCCESS(f"Arranque dentro del presupuesto ({presupuesto:.0f} ms)."))
+
+    def perfil(self, cantidad):
+        # Carga la aplicación y la URLconf, como hace la primera petición
+        resultado = self.ejecutar([
+            '-X', 'importtime', '-c',
+            'import api_horario.wsgi\nfrom django.urls import get_resolver\nget_resolver().url_patterns',
+        ])
+        modulos = []
+        for linea in resultado.stderr.splitlines():
+            if not linea.startswith('import time:') or 'cumulative' in linea:
+                continue
+            propio, acumulado, nombre = linea[len('import time:'):].split('|')
+            modulos.append((int(acumulado), int(propio), nombre.rstrip()))
+        # Tiempo propio sumado por paquete raíz: señala qué dependencia pesa
+        paquetes = Counter()
+        for _, propio, nombre in modulos:
+            paquetes[nombre.strip().split('.')[0]] += propio
+        self.stdout.write(f"Importación total: {sum(paquetes.values()) / 1000:.0f} ms. Paquetes más costosos:")
+        for paquete, propio in paquetes.most_common(cantidad):
+            self.stdout.write(f"  {propio / 1000:8.1f} ms  {paquete}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api_app.idempotencia import purgar_expiradas
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las Idempotency-Key con más de IDEMPOTENCIA_TTL segundos, que ya "
+        "no se reproducen. Pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help="Filas borradas por transacción.")
+
+    def handle(self, *args, **options):
+        borradas = purgar_expiradas(options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"{borradas} claves de idempotencia expiradas borradas."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api_app.cargas import reconciliar_cargas
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los contadores CargaGestorDia y CargaEstudiante a partir "
+        "de Horario y Matricula."
+    )
+
+    def handle(self, *args, **options):
+        gestores, estudiantes = reconciliar_cargas()
+        self.stdout.write(self.style.SUCCESS(
+            f"{gestores} contadores de gestor y {estudiantes} de estudiante reconstruidos."
+        ))
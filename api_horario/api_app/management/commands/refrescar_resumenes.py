@@ -0,0 +1,63 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from api_app import resumenes
+from api_app.models import Programa
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los resúmenes de analítica de los programas pendientes "
+        "(pensado para cron). --benchmark compara la lectura desde resúmenes "
+        "con la agregación en vivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos', action='store_true',
+            help="Recalcula todos los programas (p. ej. al cambiar de semestre).",
+        )
+        parser.add_argument(
+            '--benchmark', action='store_true',
+            help="Mide agregación en vivo vs. lectura de resúmenes por programa.",
+        )
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self.benchmark(options['repeticiones'])
+            return
+
+        if options['todos']:
+            programas = list(Programa.objects.values_list('pk', flat=True))
+        else:
+            programas = resumenes.programas_pendientes()
+        inicio = time.perf_counter()
+        resumenes.refrescar(programas)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(programas)} programas refrescados en {time.perf_counter() - inicio:.2f} s."
+        ))
+
+    def medir(self, funcion, repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        return (time.perf_counter() - inicio) / repeticiones * 1000
+
+    def benchmark(self, repeticiones):
+        self.stdout.write(f"{'programa':>10} {'en vivo (ms)':>14} {'resumen (ms)':>14} {'caché (ms)':>12}")
+        for programa_id in Programa.objects.values_list('pk', flat=True):
+            resumenes.refrescar([programa_id])
+            en_vivo = self.medir(
+                lambda: resumenes.presentar(resumenes.calcular_en_vivo(programa_id), programa_id), repeticiones
+            )
+            def sin_cache():
+                cache.delete(resumenes._clave_cache(programa_id))
+                resumenes.leer(programa_id)
+            desde_resumen = self.medir(sin_cache, repeticiones)
+            con_cache = self.medir(lambda: resumenes.leer(programa_id), repeticiones)
+            self.stdout.write(
+                f"{programa_id:>10} {en_vivo:>14.2f} {desde_resumen:>14.2f} {con_cache:>12.3f}"
+            )
@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app import conflictos
+from api_app.models import ReporteConflictos
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera el reporte de conflictos de matrícula del semestre: choques de "
+        "horario, exceso de clases por día y de asignaturas por estudiante. "
+        "Pensado para ejecutarse al cierre de matrícula; el resultado se consulta "
+        "o descarga en /api/reportes-conflictos/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semestre', help="Código del semestre (por defecto, el actual).")
+        parser.add_argument(
+            '--procesos', type=int, default=min(os.cpu_count() or 1, 4),
+            help="Procesos que revisan lotes en paralelo (1 para no usar procesos).",
+        )
+        parser.add_argument('--lote', type=int, default=2000, help="Estudiantes por lote.")
+        parser.add_argument(
+            '--conservar', type=int, default=5,
+            help="Reportes más recientes que se conservan; los anteriores se borran.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            reporte = conflictos.generar_reporte(
+                options['semestre'], procesos=options['procesos'], tamano_lote=options['lote']
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        antiguos = ReporteConflictos.objects.values_list('pk', flat=True)[options['conservar']:]
+        ReporteConflictos.objects.filter(pk__in=list(antiguos)).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reporte {reporte.pk} ({reporte.semestre}): {reporte.estudiantes} estudiantes revisados, "
+            f"{reporte.con_conflictos} con conflictos, en {reporte.segundos:.2f} s."
+        ))
@@ -0,0 +1,224 @@
+import json
+import random
+import re
+from datetime import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api_app.models import (
+    Asignatura, CargaGestorDia, Horario, Matricula, Notificacion,
+    NotificacionUsuario, Programa, Salon, Semestre, Usuario,
+)
+
+
+class _Revertir(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN sobre las consultas frecuentes y falla si alguna "
+        "recorre su tabla completa (Seq Scan / SCAN), no usa el índice que le "
+        "corresponde o supera su presupuesto de costo. Con --sembrar genera datos "
+        "sintéticos dentro de una transacción que se revierte al final, para "
+        "usarlo en CI sobre una base vacía (lo ejecuta api_app/tests.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sembrar', type=int, default=0, metavar='ESTUDIANTES',
+            help="Genera un conjunto de datos con este número de estudiantes.",
+        )
+        parser.add_argument(
+            '--verbose-planes', action='store_true', help="Imprime cada plan.",
+        )
+
+    # nombre -> (fábrica del queryset, tabla que no debe recorrerse, índice (o tupla
+    #           de índices) que debe usar, costo máximo en Postgres, solo Postgres)
+    def consultas(self, ids):
+        return {
+            'horario_gestor_dia': (
+                lambda: Horario.objects.filter(gestor_id=ids['gestor'], dia='LUN'),
+                'api_app_horario', 'horario_gestor_dia_idx', 50, False,
+            ),
+            'horario_salon_franja': (
+                lambda: Horario.objects.filter(
+                    salon_id=ids['salon'], dia='MAR',
+                    hora_inicio__lt=time(11), hora_fin__gt=time(9),
+                ),
+                'api_app_horario', 'horario_salon_dia_hora_idx', 50, False,
+            ),
+            'matricula_estudiante': (
+                lambda: Matricula.objects.filter(estudiante_id=ids['estudiante'], semestre_id=ids['semestre']),
+                'api_app_matricula', 'matricula_sem_est_idx', 50, False,
+            ),
+            'matricula_por_asignatura': (
+                lambda: Matricula.objects.filter(asignatura_id=ids['asignatura'], semestre_id=ids['semestre']),
+                'api_app_matricula', 'matricula_sem_asig_idx', 200, False,
+            ),
+            'notificaciones_no_leidas': (
+                lambda: NotificacionUsuario.objects.filter(usuario_id=ids['estudiante'], leida=False),
+                'api_app_notificacionusuario', 'notifusuario_no_leidas_idx', 50, False,
+            ),
+            'carga_gestor_dia': (
+                lambda: CargaGestorDia.objects.filter(gestor_id=ids['gestor'], dia='LUN'),
+                # El índice del unique_together tiene nombre generado distinto por motor
+                'api_app_cargagestordia', None, 20, False,
+            ),
+            'asignatura_por_nombre': (
+                lambda: Asignatura.objects.filter(nombre='Asignatura 7'),
+                'api_app_asignatura', 'asignatura_nombre_idx', 20, False,
+            ),
+            # Igual que AsignaturaViewSet.buscar_asignaturas; icontains solo
+            # puede usar índice con pg_trgm (migración 0009)
+            'buscador_asignaturas': (
+                lambda: Asignatura.objects.filter(Q(nombre__icontains='natura 12') | Q(codigo__icontains='natura 12')),
+                'api_app_asignatura', ('asignatura_nombre_trgm_idx', 'asignatura_codigo_trgm_idx'), 100, True,
+            ),
+        }
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                ids = self.sembrar(options['sembrar']) if options['sembrar'] else self.ids_existentes()
+                # Sin estadísticas SQLite elige entre índices sin mirar la selectividad
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                fallos = self.verificar(ids, options['verbose_planes'])
+                if options['sembrar']:
+                    raise _Revertir()
+        except _Revertir:
+            pass
+
+        if fallos:
+            raise CommandError("Regresiones de plan:\n" + "\n".join(f"  - {f}" for f in fallos))
+        self.stdout.write(self.style.SUCCESS("Todos los planes usan índices y están dentro del presupuesto."))
+
+    def ids_existentes(self):
+        def primero(modelo, **filtro):
+            valor = modelo.objects.filter(**filtro).values_list('pk', flat=True).first()
+            if valor is None:
+                raise CommandError(f"No hay datos de {modelo.__name__}; use --sembrar.")
+            return valor
+
+        return {
+            'gestor': primero(Usuario, rol='GC'),
+            'estudiante': primero(Usuario, rol='ES'),
+            'salon': primero(Salon),
+            'asignatura': primero(Asignatura),
+            'semestre': Semestre.codigo_actual() or '',
+        }
+
+    def verificar(self, ids, mostrar):
+        fallos = []
+        for nombre, (consulta, tabla, indice, costo_max, solo_postgres) in self.consultas(ids).items():
+            if solo_postgres and connection.vendor != 'postgresql':
+                self.stdout.write(f"{nombre}: omitida (requiere Postgres)")
+                continue
+            if connection.vendor == 'postgresql':
+                plan = json.loads(consulta().explain(format='json'))[0]['Plan']
+                if mostrar:
+                    self.stdout.write(json.dumps(plan, indent=2))
+                recorridos = [n for n in self.nodos(plan) if n['Node Type'] == 'Seq Scan' and n.get('Relation Name') == tabla]
+                usados = {n['Index Name'] for n in self.nodos(plan) if 'Index Name' in n}
+                costo = plan['Total Cost']
+                if recorridos:
+                    fallos.append(f"{nombre}: Seq Scan sobre {tabla}")
+                if costo > costo_max:
+                    fallos.append(f"{nombre}: costo {costo} > {costo_max}")
+                self.stdout.write(f"{nombre}: costo {costo}")
+            else:
+                plan = consulta().explain()
+                if mostrar:
+                    self.stdout.write(plan)
+                # SQLite: 'SCAN tabla' sin índice es un recorrido completo
+                if any(
+                    linea.split('SCAN ', 1)[1].split()[0] == tabla and 'INDEX' not in linea
+                    for linea in plan.splitlines() if 'SCAN ' in linea
+                ):
+                    fallos.append(f"{nombre}: SCAN completo de {tabla}")
+                usados = set(re.findall(r'USING (?:COVERING )?INDEX (\w+)', plan))
+                self.stdout.write(f"{nombre}: ok")
+            # Otro índice también evita el SCAN: sin esto no se notaría que el esperado se borró
+            esperados = (indice,) if isinstance(indice, str) else indice or ()
+            for esperado in esperados:
+                if esperado not in usados:
+                    fallos.append(f"{nombre}: no usa {esperado} (usa {', '.join(sorted(usados)) or 'ninguno'})")
+        return fallos
+
+    def nodos(self, plan):
+        yield plan
+        for hijo in plan.get('Plans', ()):
+            yield from self.nodos(hijo)
+
+    def sembrar(self, estudiantes):
+        # Proporciones aproximadas a una facultad real; todo con bulk_create
+        rng = random.Random(42)
+        anterior, _ = Semestre.objects.get_or_create(codigo='PLAN-0')
+        semestre, _ = Semestre.objects.get_or_create(codigo='PLAN-1')
+        n_gestores = max(estudiantes // 20, 5)
+        n_asignaturas = max(estudiantes // 25, 10)
+        n_salones = max(estudiantes // 100, 5)
+
+        usuarios = Usuario.objects.bulk_create(
+            [Usuario(username=f'plan_gc_{i}', rol='GC') for i in range(n_gestores)]
+            + [Usuario(username=f'plan_es_{i}', rol='ES') for i in range(estudiantes)],
+            batch_size=1000,
+        )
+        gestores, alumnos = usuarios[:n_gestores], usuarios[n_gestores:]
+        programa = Programa.objects.create(nombre='Programa plan', codigo='PLAN')
+        asignaturas = Asignatura.objects.bulk_create(
+            [Asignatura(codigo=f'PLAN{i}', nombre=f'Asignatura {i}', programa=programa, creditos=3)
+             for i in range(n_asignaturas)],
+            batch_size=1000,
+        )
+        salones = Salon.objects.bulk_create(
+            [Salon(codigo=f'PLAN-S{i}', capacidad=40, edificio=f'E{i % 5}') for i in range(n_salones)]
+        )
+        dias = [codigo for codigo, _ in Horario.DIAS_SEMANA]
+        Horario.objects.bulk_create(
+            [
+                Horario(
+                    asignatura=asignatura, salon=rng.choice(salones), gestor=rng.choice(gestores),
+                    dia=rng.choice(dias), hora_inicio=time(h), hora_fin=time(h + 2),
+                )
+                for asignatura in asignaturas
+                for h in rng.sample([7, 9, 11, 14], 2)
+            ],
+            batch_size=1000,
+        )
+        Matricula.objects.bulk_create(
+            [
+                Matricula(estudiante=alumno, asignatura=asignatura, semestre=periodo)
+                # Con historial, como en producción: el índice único empieza por estudiante
+                # y sin un semestre anterior parecería tan selectivo como (semestre, estudiante)
+                for periodo in (anterior, semestre)
+                for alumno in alumnos
+                for asignatura in rng.sample(asignaturas, min(5, len(asignaturas)))
+            ],
+            batch_size=2000,
+        )
+        notificaciones = Notificacion.objects.bulk_create(
+            [Notificacion(titulo=f'Aviso {i}', mensaje='-', tipo='GEN', emisor=gestores[0]) for i in range(20)]
+        )
+        NotificacionUsuario.objects.bulk_create(
+            [
+                NotificacionUsuario(notificacion=notificacion, usuario=alumno, leida=rng.random() < 0.9)
+                for notificacion in notificaciones
+                for alumno in alumnos
+            ],
+            batch_size=5000,
+        )
+        CargaGestorDia.objects.bulk_create(
+            [CargaGestorDia(gestor=gestor, dia=dia, clases=1) for gestor in gestores for dia in dias],
+            batch_size=2000,
+        )
+        return {
+            'gestor': gestores[0].pk,
+            'estudiante': alumnos[0].pk,
+            'salon': salones[0].pk,
+            'asignatura': asignaturas[0].pk,
+            'semestre': semestre.codigo,
+        }
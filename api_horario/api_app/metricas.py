@@ -0,0 +1,260 @@
+# api_app/metricas.py
+#
+# Métricas estilo Prometheus por ruta de DRF (p. ej. 'horario-list',
+# 'estudiante-horario-por-dia', 'notificaciones-enviar-masiva').
+#
+# Registro sin locks: cada hilo de cada worker acumula en su propio diccionario
+# y cada METRICAS_INTERVALO segundos lo vuelca completo a un archivo propio
+# (metricas-<pid>-<hilo>.json, escrito con rename atómico). El endpoint
+# /metrics suma todos los archivos del directorio, así que funciona con varios
+# procesos sin memoria compartida ni coordinación entre ellos.
+#
+# Al terminar, cada proceso vuelca lo que le quedaba (atexit). Los archivos de
+# procesos que ya no existen se pliegan en TERMINADOS al agregar, para que los
+# contadores no bajen ni el directorio crezca con cada worker reciclado. Los
+# nombres llevan el instante de creación: un pid reutilizado no pisa el archivo
+# de un proceso anterior. Un directorio por máquina: la vida de cada pid se
+# comprueba con os.kill(pid, 0).
+
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TERMINADOS = 'terminados.json'
+
+_local = threading.local()
+_shards = []  # todos los del proceso, para el volcado final
+
+
+def _directorio():
+    directorio = Path(getattr(
+        settings, 'METRICAS_DIR',
+        Path(tempfile.gettempdir()) / 'api_horario_metricas',
+    ))
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _serie_vacia():
+    return {
+        'peticiones': defaultdict(int),  # por código de estado
+        'errores': 0,
+        'buckets': [0] * len(BUCKETS),
+        'duracion_suma': 0.0,
+        'duracion_cuenta': 0,
+        'db_suma': 0.0,
+        'bytes_suma': 0,
+    }
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    # Tras un fork el hilo hereda el shard del padre: se empieza uno nuevo
+    if shard is None or shard['pid'] != os.getpid():
+        pid = os.getpid()
+        shard = _local.shard = {
+            'series': {}, 'ultimo_volcado': 0.0, 'pid': pid,
+            'archivo': f'metricas-{pid}-{threading.get_ident()}-{time.time_ns()}.json',
+        }
+        _shards.append(shard)
+    return shard
+
+
+def registrar(ruta, metodo, estado, duracion, duracion_db, tamano):
+    shard = _shard()
+    serie = shard['series'].get((ruta, metodo))
+    if serie is None:
+        serie = shard['series'][(ruta, metodo)] = _serie_vacia()
+
+    serie['peticiones'][estado] += 1
+    if estado >= 500:
+        serie['errores'] += 1
+    for i, limite in enumerate(BUCKETS):
+        if duracion <= limite:
+            serie['buckets'][i] += 1
+            break
+    serie['duracion_suma'] += duracion
+    serie['duracion_cuenta'] += 1
+    serie['db_suma'] += duracion_db
+    serie['bytes_suma'] += tamano
+
+    ahora = time.monotonic()
+    if ahora - shard['ultimo_volcado'] >= getattr(settings, 'METRICAS_INTERVALO', 5):
+        shard['ultimo_volcado'] = ahora
+        _volcar(shard)
+
+
+def _escribir(destino, series):
+    datos = [
+        {'ruta': ruta, 'metodo': metodo, **serie}
+        for (ruta, metodo), serie in series.items()
+    ]
+    with tempfile.NamedTemporaryFile('w', dir=destino.parent, delete=False, suffix='.tmp') as tmp:
+        json.dump(datos, tmp)
+    os.replace(tmp.name, destino)
+
+
+def _volcar(shard):
+    # Solo este hilo escribe este archivo: no hace falta lock
+    _escribir(_directorio() / shard['archivo'], shard['series'])
+
+
+@atexit.register
+def _volcar_al_salir():
+    # Lo registrado desde el último volcado de cada hilo (hasta METRICAS_INTERVALO s)
+    for shard in list(_shards):
+        if shard['pid'] == os.getpid() and shard['series']:
+            _volcar(shard)
+
+
+def _leer(archivo):
+    try:
+        return json.loads(archivo.read_text())
+    except (OSError, ValueError):
+        return []  # archivo que acaba de plegarse o reemplazarse
+
+
+def _sumar(total, datos):
+    for fila in datos:
+        clave = (fila['ruta'], fila['metodo'])
+        serie = total.get(clave)
+        if serie is None:
+            serie = total[clave] = _serie_vacia()
+        for estado, cuenta in fila['peticiones'].items():
+            serie['peticiones'][int(estado)] += cuenta
+        serie['errores'] += fila['errores']
+        serie['buckets'] = [a + b for a, b in zip(serie['buckets'], fila['buckets'])]
+        for campo in ('duracion_suma', 'duracion_cuenta', 'db_suma', 'bytes_suma'):
+            serie[campo] += fila[campo]
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # existe, aunque sea de otro usuario
+    return True
+
+
+def _plegar_terminados(directorio):
+    terminados = [
+        archivo for archivo in directorio.glob('metricas-*.json')
+        if not _vivo(int(archivo.name.split('-')[1]))
+    ]
+    if not terminados:
+        return
+    acumulado = {}
+    for archivo in [directorio / TERMINADOS, *terminados]:
+        _sumar(acumulado, _leer(archivo))
+    _escribir(directorio / TERMINADOS, acumulado)
+    for archivo in terminados:
+        archivo.unlink(missing_ok=True)
+
+
+def _agregar():
+    directorio = _directorio()
+    # Dos /metrics a la vez no deben plegar el mismo archivo dos veces
+    with open(directorio / '.lock', 'a') as candado:
+        fcntl.flock(candado, fcntl.LOCK_EX)
+        _plegar_terminados(directorio)
+        total = {}
+        for archivo in [directorio / TERMINADOS, *directorio.glob('metricas-*.json')]:
+            _sumar(total, _leer(archivo))
+    return total
+
+
+def exponer():
+    lineas = [
+        '# HELP api_requests_total Peticiones atendidas por ruta, método y estado.',
+        '# TYPE api_requests_total counter',
+    ]
+    series = sorted(_agregar().items())
+    for (ruta, metodo), serie in series:
+        for estado, cuenta in sorted(serie['peticiones'].items()):
+            lineas.append(
+                f'api_requests_total{{route="{ruta}",method="{metodo}",status="{estado}"}} {cuenta}'
+            )
+
+    lineas += [
+        '# HELP api_request_errors_total Peticiones con respuesta 5xx.',
+        '# TYPE api_request_errors_total counter',
+    ]
+    for (ruta, metodo), serie in series:
+        lineas.append(f'api_request_errors_total{{route="{ruta}",method="{metodo}"}} {serie["errores"]}')
+
+    lineas += [
+        '# HELP api_request_duration_seconds Latencia de la petición.',
+        '# TYPE api_request_duration_seconds histogram',
+    ]
+    for (ruta, metodo), serie in series:
+        etiquetas = f'route="{ruta}",method="{metodo}"'
+        acumulado = 0
+        for limite, cuenta in zip(BUCKETS, serie['buckets']):
+            acumulado += cuenta
+            lineas.append(f'api_request_duration_seconds_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+        lineas.append(f'api_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}} {serie["duracion_cuenta"]}')
+        lineas.append(f'api_request_duration_seconds_sum{{{etiquetas}}} {serie["duracion_suma"]:.6f}')
+        lineas.append(f'api_request_duration_seconds_count{{{etiquetas}}} {serie["duracion_cuenta"]}')
+
+    lineas += [
+        '# HELP api_db_duration_seconds_total Tiempo en consultas SQL.',
+        '# TYPE api_db_duration_seconds_total counter',
+    ]
+    for (ruta, metodo), serie in series:
+        lineas.append(f'api_db_duration_seconds_total{{route="{ruta}",method="{metodo}"}} {serie["db_suma"]:.6f}')
+
+    lineas += [
+        '# HELP api_response_bytes_total Bytes de respuesta enviados.',
+        '# TYPE api_response_bytes_total counter',
+    ]
+    for (ruta, metodo), serie in series:
+        lineas.append(f'api_response_bytes_total{{route="{ruta}",method="{metodo}"}} {serie["bytes_suma"]}')
+
+    return '\n'.join(lineas) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tiempo_db = [0.0]
+
+        def medir_db(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                tiempo_db[0] += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(medir_db))
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        # Nombre de la ruta, no la URL: evita una serie por cada id
+        coincidencia = getattr(request, 'resolver_match', None)
+        ruta = (coincidencia.url_name if coincidencia else None) or 'desconocida'
+        tamano = 0 if response.streaming else len(response.content)
+        registrar(ruta, request.method, response.status_code, duracion, tiempo_db[0], tamano)
+        return response
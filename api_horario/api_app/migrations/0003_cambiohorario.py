@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0002_remove_matricula_programa_alter_usuario_groups_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioHorario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('horario_id', models.BigIntegerField(unique=True)),
+                ('asignatura_id', models.BigIntegerField()),
+                ('accion', models.CharField(choices=[('MOD', 'Modificado'), ('ELI', 'Eliminado')], max_length=3)),
+                ('dia', models.CharField(choices=[('LUN', 'Lunes'), ('MAR', 'Martes'), ('MIE', 'Miércoles'), ('JUE', 'Jueves'), ('VIE', 'Viernes')], max_length=3)),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fin', models.TimeField()),
+                ('salon_id', models.BigIntegerField()),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('emisor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['fecha'],
+            },
+        ),
+    ]
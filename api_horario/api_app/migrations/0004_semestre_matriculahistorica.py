@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def crear_semestres_existentes(apps, schema_editor):
+    # Cada código libre ya usado en Matricula.semestre pasa a ser un Semestre
+    Matricula = apps.get_model('api_app', 'Matricula')
+    Semestre = apps.get_model('api_app', 'Semestre')
+    codigos = Matricula.objects.values_list('semestre', flat=True).distinct()
+    Semestre.objects.bulk_create(
+        [Semestre(codigo=codigo) for codigo in codigos], ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0003_cambiohorario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Semestre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=10, unique=True)),
+                ('fecha_inicio', models.DateField(blank=True, null=True)),
+                ('fecha_fin', models.DateField(blank=True, null=True)),
+                ('actual', models.BooleanField(default=False)),
+                ('cerrado', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['-codigo'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('actual', True)), fields=('actual',), name='un_solo_semestre_actual')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MatriculaHistorica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matricula_id', models.BigIntegerField()),
+                ('fecha_archivo', models.DateTimeField(auto_now_add=True)),
+                ('asignatura', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.asignatura')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('semestre', models.ForeignKey(db_column='semestre', on_delete=django.db.models.deletion.PROTECT, related_name='matriculas_historicas', to='api_app.semestre', to_field='codigo')),
+            ],
+        ),
+        migrations.RunPython(crear_semestres_existentes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='matricula',
+            name='semestre',
+            field=models.ForeignKey(db_column='semestre', on_delete=django.db.models.deletion.PROTECT, to='api_app.semestre', to_field='codigo'),
+        ),
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(fields=['semestre', 'estudiante'], name='matricula_sem_est_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(fields=['semestre', 'asignatura'], name='matricula_sem_asig_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matriculahistorica',
+            index=models.Index(fields=['estudiante', 'semestre'], name='mathist_est_sem_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='matriculahistorica',
+            unique_together={('semestre', 'estudiante', 'asignatura')},
+        ),
+    ]
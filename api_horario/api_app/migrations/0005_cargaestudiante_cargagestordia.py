@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def poblar_cargas(apps, schema_editor):
+    # Contadores iniciales a partir de los datos existentes
+    from django.db.models import Count
+
+    Horario = apps.get_model('api_app', 'Horario')
+    Matricula = apps.get_model('api_app', 'Matricula')
+    CargaGestorDia = apps.get_model('api_app', 'CargaGestorDia')
+    CargaEstudiante = apps.get_model('api_app', 'CargaEstudiante')
+    CargaGestorDia.objects.bulk_create([
+        CargaGestorDia(gestor_id=fila['gestor_id'], dia=fila['dia'], clases=fila['total'])
+        for fila in Horario.objects.order_by().values('gestor_id', 'dia').annotate(total=Count('pk'))
+    ])
+    CargaEstudiante.objects.bulk_create([
+        CargaEstudiante(estudiante_id=fila['estudiante_id'], semestre_id=fila['semestre_id'], asignaturas=fila['total'])
+        for fila in Matricula.objects.order_by().values('estudiante_id', 'semestre_id').annotate(total=Count('pk'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0004_semestre_matriculahistorica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargaEstudiante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asignaturas', models.PositiveSmallIntegerField(default=0)),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('semestre', models.ForeignKey(db_column='semestre', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.semestre', to_field='codigo')),
+            ],
+            options={
+                'unique_together': {('estudiante', 'semestre')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CargaGestorDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.CharField(choices=[('LUN', 'Lunes'), ('MAR', 'Martes'), ('MIE', 'Miércoles'), ('JUE', 'Jueves'), ('VIE', 'Viernes')], max_length=3)),
+                ('clases', models.PositiveSmallIntegerField(default=0)),
+                ('gestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('gestor', 'dia')},
+            },
+        ),
+        migrations.RunPython(poblar_cargas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0005_cargaestudiante_cargagestordia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('operacion', models.CharField(choices=[('I', 'Insertado'), ('U', 'Actualizado'), ('D', 'Eliminado')], max_length=1)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
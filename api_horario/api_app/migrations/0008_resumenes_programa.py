@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0007_claveidempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCreditosEstudiante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creditos', models.PositiveIntegerField()),
+                ('estudiantes', models.PositiveIntegerField()),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.programa')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenHorasGestor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clases', models.PositiveIntegerField()),
+                ('minutos', models.PositiveIntegerField()),
+                ('gestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.programa')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenMatriculaAsignatura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matriculados', models.PositiveIntegerField()),
+                ('asignatura', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.asignatura')),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.programa')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenPrograma',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semestre', models.CharField(blank=True, max_length=10)),
+                ('pendiente', models.BooleanField(default=True)),
+                ('actualizado', models.DateTimeField(null=True)),
+                ('programa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen', to='api_app.programa')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenUsoSalon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.CharField(choices=[('LUN', 'Lunes'), ('MAR', 'Martes'), ('MIE', 'Miércoles'), ('JUE', 'Jueves'), ('VIE', 'Viernes')], max_length=3)),
+                ('clases', models.PositiveIntegerField()),
+                ('minutos', models.PositiveIntegerField()),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.programa')),
+                ('salon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.salon')),
+            ],
+        ),
+    ]
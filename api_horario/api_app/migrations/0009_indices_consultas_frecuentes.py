@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:33
+
+from django.db import DatabaseError, migrations, models
+
+
+# El buscador filtra con icontains, que Django traduce en Postgres a
+# UPPER(col::text) LIKE UPPER(%s): el índice trigram debe ser sobre esa expresión.
+INDICES_TRIGRAM = (
+    ('asignatura_nombre_trgm_idx', 'nombre'),
+    ('asignatura_codigo_trgm_idx', 'codigo'),
+)
+
+
+def crear_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # pg_trgm es "trusted" desde Postgres 13: basta ser dueño de la base. En
+    # versiones anteriores, o sin permiso CREATE sobre la base, un superusuario
+    # debe ejecutar antes `CREATE EXTENSION pg_trgm;`; si ya existe, IF NOT
+    # EXISTS no pide privilegios.
+    try:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError as exc:
+        raise DatabaseError(
+            "No se pudo crear la extensión pg_trgm (requiere superusuario en Postgres < 13). "
+            "Ejecute `CREATE EXTENSION pg_trgm;` como superusuario y vuelva a correr migrate."
+        ) from exc
+    for nombre, columna in INDICES_TRIGRAM:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nombre} ON api_app_asignatura '
+            f'USING gin (UPPER({columna}::text) gin_trgm_ops)'
+        )
+
+
+def eliminar_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, _ in INDICES_TRIGRAM:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0008_resumenes_programa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignatura',
+            index=models.Index(fields=['nombre'], name='asignatura_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horario',
+            index=models.Index(fields=['gestor', 'dia'], name='horario_gestor_dia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horario',
+            index=models.Index(fields=['salon', 'dia', 'hora_inicio'], name='horario_salon_dia_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacionusuario',
+            index=models.Index(condition=models.Q(('leida', False)), fields=['usuario'], name='notifusuario_no_leidas_idx'),
+        ),
+        migrations.RunPython(crear_indices_trigram, eliminar_indices_trigram),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0009_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporteConflictos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semestre', models.CharField(max_length=10)),
+                ('estado', models.CharField(choices=[('P', 'En curso'), ('C', 'Completo'), ('F', 'Fallido')], default='P', max_length=1)),
+                ('iniciado', models.DateTimeField(auto_now_add=True)),
+                ('terminado', models.DateTimeField(null=True)),
+                ('estudiantes', models.PositiveIntegerField(default=0)),
+                ('con_conflictos', models.PositiveIntegerField(default=0)),
+                ('segundos', models.FloatField(null=True)),
+            ],
+            options={
+                'ordering': ['-iniciado'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConflictoMatricula',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('CHO', 'Choque de horario'), ('DIA', 'Exceso de clases en un día'), ('TOT', 'Exceso de asignaturas')], max_length=3)),
+                ('dia', models.CharField(blank=True, choices=[('LUN', 'Lunes'), ('MAR', 'Martes'), ('MIE', 'Miércoles'), ('JUE', 'Jueves'), ('VIE', 'Viernes')], max_length=3)),
+                ('asignaturas', models.JSONField()),
+                ('programas', models.PositiveSmallIntegerField()),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reporte', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conflictos', to='api_app.reporteconflictos')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['reporte', 'tipo'], name='conflicto_reporte_tipo_idx'), models.Index(fields=['reporte', 'estudiante'], name='conflicto_reporte_est_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0010_reporte_conflictos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglasPrograma',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duracion_min', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('duracion_max', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('hora_apertura', models.TimeField(blank=True, null=True)),
+                ('hora_cierre', models.TimeField(blank=True, null=True)),
+                ('dias', models.JSONField(blank=True, null=True)),
+                ('max_clases_gestor_dia', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('max_asignaturas_estudiante', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('max_clases_estudiante_dia', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('programa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reglas', to='api_app.programa')),
+            ],
+        ),
+    ]
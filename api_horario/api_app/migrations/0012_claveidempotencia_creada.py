@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0011_reglasprograma'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claveidempotencia',
+            index=models.Index(fields=['creada'], name='idempotencia_creada_idx'),
+        ),
+    ]
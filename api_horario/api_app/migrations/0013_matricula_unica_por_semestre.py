@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0012_claveidempotencia_creada'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='matricula',
+            unique_together={('estudiante', 'asignatura', 'semestre')},
+        ),
+    ]
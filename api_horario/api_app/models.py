@@ -1,4 +1,7 @@
 from django.db import models
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 class Usuario(AbstractUser):
@@ -48,6 +51,13 @@ class Asignatura(models.Model):
     gestores = models.ManyToManyField(Usuario, limit_choices_to={'rol': 'GC'})
     creditos = models.PositiveSmallIntegerField()
 
+    class Meta:
+        indexes = [
+            # Búsquedas por nombre exacto/prefijo. Las de icontains del buscador
+            # usan índices trigram creados solo en Postgres (migración 0009).
+            models.Index(fields=['nombre'], name='asignatura_nombre_idx'),
+        ]
+
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
 
@@ -77,6 +87,12 @@ class Horario(models.Model):
 
     class Meta:
         ordering = ['dia', 'hora_inicio']
+        indexes = [
+            # Límite de clases por gestor y día / horario del gestor
+            models.Index(fields=['gestor', 'dia'], name='horario_gestor_dia_idx'),
+            # Choques de salón: mismo salón, día y franja
+            models.Index(fields=['salon', 'dia', 'hora_inicio'], name='horario_salon_dia_hora_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(hora_fin__gt=models.F('hora_inicio')),
@@ -88,19 +104,94 @@ class Horario(models.Model):
     def __str__(self):
         return f"{self.asignatura} - {self.get_dia_display()} {self.hora_inicio}-{self.hora_fin}"
 
+class Semestre(models.Model):
+    codigo = models.CharField(max_length=10, unique=True)  # p. ej. '2025-1'
+    fecha_inicio = models.DateField(null=True, blank=True)
+    fecha_fin = models.DateField(null=True, blank=True)
+    actual = models.BooleanField(default=False)
+    cerrado = models.BooleanField(default=False)  # sus matrículas ya fueron archivadas
+
+    class Meta:
+        ordering = ['-codigo']
+        constraints = [
+            # Solo puede haber un semestre actual
+            models.UniqueConstraint(
+                fields=['actual'], condition=models.Q(actual=True),
+                name='un_solo_semestre_actual'
+            ),
+        ]
+
+    CLAVE_CACHE_ACTUAL = 'semestre_actual'
+
+    @classmethod
+    def codigo_actual(cls):
+        # Consultado en cada request de matrícula/horario: se cachea el código
+        codigo = cache.get(cls.CLAVE_CACHE_ACTUAL)
+        if codigo is None:
+            codigo = cls.objects.filter(actual=True).values_list('codigo', flat=True).first() or ''
+            cache.set(cls.CLAVE_CACHE_ACTUAL, codigo, 60)
+        return codigo or None
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(self.CLAVE_CACHE_ACTUAL)
+
+    def __str__(self):
+        return self.codigo
+
+class MatriculaQuerySet(models.QuerySet):
+    def del_semestre(self, codigo):
+        return self.filter(semestre_id=codigo)
+
+    def vigentes(self):
+        # Matrículas del semestre actual; sin semestre actual configurado no filtra
+        codigo = Semestre.codigo_actual()
+        return self.del_semestre(codigo) if codigo else self
+
 class Matricula(models.Model):
     estudiante = models.ForeignKey(Usuario, on_delete=models.CASCADE, limit_choices_to={'rol': 'ES'})
     asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE)
     # Eliminado: programa = models.ForeignKey(Programa, on_delete=models.CASCADE)
     # Se recomienda acceder al programa via asignatura.programa para evitar redundancia
-    semestre = models.CharField(max_length=10)
+    # FK por código: la columna sigue guardando '2025-1' como antes
+    semestre = models.ForeignKey(
+        Semestre, on_delete=models.PROTECT, to_field='codigo', db_column='semestre'
+    )
+
+    objects = MatriculaQuerySet.as_manager()
 
     class Meta:
-        unique_together = ('estudiante', 'asignatura')
+        # Una asignatura reprobada puede volver a cursarse en otro semestre
+        unique_together = ('estudiante', 'asignatura', 'semestre')
+        indexes = [
+            models.Index(fields=['semestre', 'estudiante'], name='matricula_sem_est_idx'),
+            models.Index(fields=['semestre', 'asignatura'], name='matricula_sem_asig_idx'),
+        ]
 
     def __str__(self):
         return f"{self.estudiante} - {self.asignatura}"
 
+class MatriculaHistorica(models.Model):
+    # Archivo de matrículas de semestres cerrados (comando archivar_semestres).
+    # Solo lectura: se mantiene fuera de la tabla caliente de Matricula.
+    estudiante = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE, related_name='+')
+    semestre = models.ForeignKey(
+        Semestre, on_delete=models.PROTECT, to_field='codigo', db_column='semestre',
+        related_name='matriculas_historicas'
+    )
+    matricula_id = models.BigIntegerField()  # id original en Matricula
+    fecha_archivo = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('semestre', 'estudiante', 'asignatura')
+        indexes = [
+            models.Index(fields=['estudiante', 'semestre'], name='mathist_est_sem_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante} - {self.asignatura} ({self.semestre_id})"
+
 class Notificacion(models.Model):
     TIPOS = (
         ('GEN', 'General'),
@@ -111,7 +202,8 @@ class Notificacion(models.Model):
     titulo = models.CharField(max_length=100)
     mensaje = models.TextField()
     tipo = models.CharField(max_length=3, choices=TIPOS)
-    emisor = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='notificaciones_enviadas')
+    # Nulo solo en avisos automáticos sin autor conocido (api_app/notificaciones.py)
+    emisor = models.ForeignKey(Usuario, on_delete=models.CASCADE, null=True, related_name='notificaciones_enviadas')
     fecha_envio = models.DateTimeField(auto_now_add=True)
     asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE, null=True, blank=True)
     horario = models.ForeignKey(Horario, on_delete=models.CASCADE, null=True, blank=True)
@@ -127,6 +219,13 @@ class NotificacionUsuario(models.Model):
 
     class Meta:
         unique_together = ('notificacion', 'usuario')
+        indexes = [
+            # Bandeja de no leídas: índice parcial, pequeño aunque el histórico crezca
+            models.Index(
+                fields=['usuario'], condition=models.Q(leida=False),
+                name='notifusuario_no_leidas_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.usuario} - {self.notificacion}"
@@ -136,4 +235,216 @@ class ConfiguracionUsuario(models.Model):
     tema_oscuro = models.BooleanField(default=False)
 
     def __str__(self):
-        return f"Configuración de {self.usuario}"
\ No newline at end of file
+        return f"Configuración de {self.usuario}"
+
+class CambioHorario(models.Model):
+    # Cambio pendiente de notificar. Se guarda una fila por horario (la última
+    # edición gana) y las entregas agrupan los cambios por estudiante.
+    ACCIONES = (
+        ('MOD', 'Modificado'),
+        ('ELI', 'Eliminado'),
+    )
+
+    # Sin ForeignKey: el horario (o su asignatura) puede no existir ya al entregar
+    horario_id = models.BigIntegerField(unique=True)
+    asignatura_id = models.BigIntegerField()
+    accion = models.CharField(max_length=3, choices=ACCIONES)
+    dia = models.CharField(max_length=3, choices=Horario.DIAS_SEMANA)
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+    salon_id = models.BigIntegerField()
+    emisor = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='+')
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['fecha']
+
+    def __str__(self):
+        return f"{self.get_accion_display()} horario {self.horario_id}"
+
+
+class CargaGestorDia(models.Model):
+    # Contador desnormalizado de clases por gestor y día (api_app/cargas.py).
+    # Se reconstruye con: python manage.py reconciliar_cargas
+    gestor = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    dia = models.CharField(max_length=3, choices=Horario.DIAS_SEMANA)
+    clases = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('gestor', 'dia')
+
+    def __str__(self):
+        return f"{self.gestor_id} {self.dia}: {self.clases}"
+
+
+class CargaEstudiante(models.Model):
+    # Contador desnormalizado de asignaturas matriculadas por estudiante y semestre
+    estudiante = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    semestre = models.ForeignKey(
+        Semestre, on_delete=models.CASCADE, to_field='codigo', db_column='semestre', related_name='+'
+    )
+    asignaturas = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('estudiante', 'semestre')
+
+    def __str__(self):
+        return f"{self.estudiante_id} {self.semestre_id}: {self.asignaturas}"
+
+
+class CambioCatalogo(models.Model):
+    # Registro de cambios del catálogo para la sincronización incremental
+    # (api_app/catalogo.py). El id es la versión: creciente en orden de confirmación.
+    OPERACIONES = (
+        ('I', 'Insertado'),
+        ('U', 'Actualizado'),
+        ('D', 'Eliminado'),
+    )
+
+    modelo = models.CharField(max_length=20)  # 'programa', 'asignatura', 'salon', 'horario'
+    objeto_id = models.BigIntegerField()
+    operacion = models.CharField(max_length=1, choices=OPERACIONES)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"v{self.pk} {self.operacion} {self.modelo} {self.objeto_id}"
+
+
+class ClaveIdempotencia(models.Model):
+    # Primera respuesta a un POST con cabecera Idempotency-Key (api_app/idempotencia.py)
+    ESTADOS = (
+        ('P', 'En curso'),
+        ('C', 'Completada'),
+    )
+
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    clave = models.CharField(max_length=255)
+    ruta = models.CharField(max_length=255)
+    huella = models.CharField(max_length=64)  # sha256 del cuerpo del request
+    estado = models.CharField(max_length=1, choices=ESTADOS, default='P')
+    codigo_respuesta = models.PositiveSmallIntegerField(null=True)
+    respuesta = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    creada = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('usuario', 'clave')
+        indexes = [
+            # Purga de claves expiradas (comando purgar_idempotencia)
+            models.Index(fields=['creada'], name='idempotencia_creada_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id}:{self.clave} ({self.get_estado_display()})"
+
+
+# === Resúmenes precalculados para la analítica de coordinadores (api_app/resumenes.py) ===
+class ResumenPrograma(models.Model):
+    # Un registro por programa: cuándo se calcularon sus resúmenes y si quedaron
+    # desactualizados por escrituras posteriores (los refresca refrescar_resumenes)
+    programa = models.OneToOneField(Programa, on_delete=models.CASCADE, related_name='resumen')
+    semestre = models.CharField(max_length=10, blank=True)
+    pendiente = models.BooleanField(default=True)
+    actualizado = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Resumen de {self.programa_id}"
+
+
+class ResumenMatriculaAsignatura(models.Model):
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='+')
+    asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE, related_name='+')
+    matriculados = models.PositiveIntegerField()
+
+
+class ResumenUsoSalon(models.Model):
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='+')
+    salon = models.ForeignKey(Salon, on_delete=models.CASCADE, related_name='+')
+    dia = models.CharField(max_length=3, choices=Horario.DIAS_SEMANA)
+    clases = models.PositiveIntegerField()
+    minutos = models.PositiveIntegerField()
+
+
+class ResumenHorasGestor(models.Model):
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='+')
+    gestor = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    clases = models.PositiveIntegerField()
+    minutos = models.PositiveIntegerField()
+
+
+class ResumenCreditosEstudiante(models.Model):
+    # Distribución: cuántos estudiantes llevan `creditos` créditos del programa
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='+')
+    creditos = models.PositiveIntegerField()
+    estudiantes = models.PositiveIntegerField()
+
+
+# === Reporte de conflictos de matrícula (api_app/conflictos.py) ===
+class ReporteConflictos(models.Model):
+    ESTADOS = (
+        ('P', 'En curso'),
+        ('C', 'Completo'),
+        ('F', 'Fallido'),
+    )
+
+    semestre = models.CharField(max_length=10)
+    estado = models.CharField(max_length=1, choices=ESTADOS, default='P')
+    iniciado = models.DateTimeField(auto_now_add=True)
+    terminado = models.DateTimeField(null=True)
+    estudiantes = models.PositiveIntegerField(default=0)  # revisados
+    con_conflictos = models.PositiveIntegerField(default=0)
+    segundos = models.FloatField(null=True)
+
+    class Meta:
+        ordering = ['-iniciado']
+
+    def __str__(self):
+        return f"Conflictos {self.semestre} ({self.get_estado_display()})"
+
+
+class ConflictoMatricula(models.Model):
+    TIPOS = (
+        ('CHO', 'Choque de horario'),
+        ('DIA', 'Exceso de clases en un día'),
+        ('TOT', 'Exceso de asignaturas'),
+    )
+
+    reporte = models.ForeignKey(ReporteConflictos, on_delete=models.CASCADE, related_name='conflictos')
+    estudiante = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    tipo = models.CharField(max_length=3, choices=TIPOS)
+    dia = models.CharField(max_length=3, choices=Horario.DIAS_SEMANA, blank=True)
+    asignaturas = models.JSONField()  # ids de las asignaturas implicadas
+    programas = models.PositiveSmallIntegerField()  # programas distintos que cursa el estudiante
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['reporte', 'tipo'], name='conflicto_reporte_tipo_idx'),
+            models.Index(fields=['reporte', 'estudiante'], name='conflicto_reporte_est_idx'),
+        ]
+
+
+# === Reglas de horario por programa (api_app/reglas.py) ===
+class ReglasPrograma(models.Model):
+    # Los campos vacíos heredan el valor de settings.REGLAS_HORARIO
+    programa = models.OneToOneField(Programa, on_delete=models.CASCADE, related_name='reglas')
+    duracion_min = models.PositiveSmallIntegerField(null=True, blank=True)  # minutos
+    duracion_max = models.PositiveSmallIntegerField(null=True, blank=True)
+    hora_apertura = models.TimeField(null=True, blank=True)
+    hora_cierre = models.TimeField(null=True, blank=True)
+    dias = models.JSONField(null=True, blank=True)  # p. ej. ["LUN", "MIE", "VIE"]
+    max_clases_gestor_dia = models.PositiveSmallIntegerField(null=True, blank=True)
+    max_asignaturas_estudiante = models.PositiveSmallIntegerField(null=True, blank=True)
+    max_clases_estudiante_dia = models.PositiveSmallIntegerField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    CLAVE_CACHE = 'reglas:programa:{}'
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(self.CLAVE_CACHE.format(self.programa_id))
+
+    def delete(self, *args, **kwargs):
+        cache.delete(self.CLAVE_CACHE.format(self.programa_id))
+        return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return f"Reglas de {self.programa_id}"
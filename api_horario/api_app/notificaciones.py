@@ -0,0 +1,211 @@
+# api_app/notificaciones.py
+#
+# Notificaciones automáticas por cambios de Horario.
+#
+# 1. Las señales registran cada edición/eliminación como un CambioHorario
+#    pendiente (una fila por horario; la última edición gana).
+# 2. Dentro de `agrupar_cambios_horario()` los cambios se acumulan en memoria
+#    y se escriben con un único bulk upsert al salir del bloque.
+# 3. `entregar_cambios_horario()` (comando `entregar_notificaciones_horario`)
+#    espera a que la ráfaga de cambios se calme y genera UNA notificación
+#    tipo 'HOR' por estudiante afectado, sin importar cuántas clases cambiaron.
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Asignatura, CambioHorario, Horario, Matricula,
+    Notificacion, NotificacionUsuario, Salon,
+)
+
+_estado = threading.local()
+_ORDEN_DIAS = {codigo: i for i, (codigo, _) in enumerate(Horario.DIAS_SEMANA)}
+
+
+# Los ajustes se leen en cada llamada para que override_settings y los
+# cambios de configuración sin reinicio tengan efecto.
+def _ventana():
+    # Segundos sin cambios nuevos antes de entregar (la ráfaga terminó)
+    return getattr(settings, 'NOTIFICACION_HORARIO_VENTANA', 60)
+
+
+def _espera_maxima():
+    # Segundos máximos que un cambio puede esperar aunque sigan llegando más
+    return getattr(settings, 'NOTIFICACION_HORARIO_ESPERA_MAXIMA', 300)
+
+
+def _tamano_lote():
+    # Tamaño de lote para los bulk_create de entrega
+    return getattr(settings, 'NOTIFICACION_HORARIO_LOTE', 500)
+
+
+def _cambio_desde_horario(horario, accion, emisor=None):
+    return CambioHorario(
+        horario_id=horario.pk,
+        asignatura_id=horario.asignatura_id,
+        accion=accion,
+        dia=horario.dia,
+        hora_inicio=horario.hora_inicio,
+        hora_fin=horario.hora_fin,
+        salon_id=horario.salon_id,
+        # Si no hay usuario en contexto (admin, shell) emite el gestor de la clase
+        emisor_id=getattr(emisor, 'pk', emisor) or horario.gestor_id,
+        fecha=timezone.now(),
+    )
+
+
+def _guardar_cambios(cambios):
+    if not cambios:
+        return
+    CambioHorario.objects.bulk_create(
+        cambios,
+        batch_size=_tamano_lote(),
+        update_conflicts=True,
+        unique_fields=['horario_id'],
+        update_fields=[
+            'asignatura_id', 'accion', 'dia', 'hora_inicio',
+            'hora_fin', 'salon_id', 'emisor', 'fecha',
+        ],
+    )
+
+
+@contextmanager
+def agrupar_cambios_horario(emisor=None):
+    # Acumula los cambios del bloque y los escribe con una sola consulta.
+    # Los bloques anidados se integran al bloque exterior.
+    lote = getattr(_estado, 'lote', None)
+    if lote is not None:
+        yield
+        return
+
+    _estado.lote = lote = {'emisor': emisor, 'cambios': {}}
+    try:
+        yield
+    except BaseException:
+        _estado.lote = None
+        raise
+    _estado.lote = None
+    _guardar_cambios(list(lote['cambios'].values()))
+
+
+def registrar_cambio_horario(horario, accion):
+    lote = getattr(_estado, 'lote', None)
+    if lote is None:
+        _guardar_cambios([_cambio_desde_horario(horario, accion)])
+        return
+    # Ediciones repetidas del mismo horario en el bloque se reducen a una
+    lote['cambios'][horario.pk] = _cambio_desde_horario(horario, accion, lote['emisor'])
+
+
+def _describir(cambio, asignaturas, salones):
+    asignatura = asignaturas.get(cambio.asignatura_id, f"Asignatura {cambio.asignatura_id}")
+    dia = dict(Horario.DIAS_SEMANA).get(cambio.dia, cambio.dia)
+    bloque = f"{dia} {cambio.hora_inicio:%H:%M}-{cambio.hora_fin:%H:%M}"
+    if cambio.accion == 'ELI':
+        return f"- {asignatura}: se canceló la clase del {bloque}."
+    salon = salones.get(cambio.salon_id, '')
+    return f"- {asignatura}: ahora {bloque}, salón {salon}."
+
+
+def _emisor(cambios, coordinadores):
+    # Quien hizo el último cambio; si ya no existe (CambioHorario.emisor es
+    # SET_NULL), otro autor del grupo o el coordinador del programa. Si tampoco
+    # hay, el aviso sale sin emisor (del sistema): los cambios se borran al
+    # entregar y el grupo no puede perderse.
+    for cambio in sorted(cambios, key=lambda c: c.fecha, reverse=True):
+        if cambio.emisor_id is not None:
+            return cambio.emisor_id
+    for cambio in cambios:
+        if coordinadores.get(cambio.asignatura_id) is not None:
+            return coordinadores[cambio.asignatura_id]
+    return None
+
+
+def entregar_cambios_horario(ventana=None, espera_maxima=None, forzar=False):
+    # Entrega los cambios pendientes agrupados por estudiante.
+    # Devuelve (notificaciones_creadas, destinatarios).
+    ventana = timedelta(seconds=_ventana() if ventana is None else ventana)
+    espera_maxima = timedelta(seconds=_espera_maxima() if espera_maxima is None else espera_maxima)
+    tamano_lote = _tamano_lote()
+
+    with transaction.atomic():
+        cambios = list(CambioHorario.objects.select_for_update(skip_locked=True))
+        if not cambios:
+            return 0, 0
+
+        ahora = timezone.now()
+        rafaga_en_curso = ahora - cambios[-1].fecha < ventana
+        espera_vencida = ahora - cambios[0].fecha >= espera_maxima
+        if rafaga_en_curso and not espera_vencida and not forzar:
+            return 0, 0
+
+        por_asignatura = defaultdict(list)
+        for cambio in cambios:
+            por_asignatura[cambio.asignatura_id].append(cambio)
+
+        # Una sola consulta para todos los estudiantes afectados
+        cambios_por_estudiante = defaultdict(set)
+        matriculas = Matricula.objects.vigentes().filter(
+            asignatura_id__in=por_asignatura
+        ).values_list('estudiante_id', 'asignatura_id')
+        for estudiante_id, asignatura_id in matriculas.iterator():
+            cambios_por_estudiante[estudiante_id].update(
+                c.horario_id for c in por_asignatura[asignatura_id]
+            )
+
+        # Estudiantes con el mismo conjunto de cambios comparten la Notificacion;
+        # cada uno recibe una sola fila de NotificacionUsuario.
+        grupos = defaultdict(list)
+        for estudiante_id, horarios in cambios_por_estudiante.items():
+            grupos[frozenset(horarios)].append(estudiante_id)
+
+        asignaturas = {}
+        coordinadores = {}
+        filas = Asignatura.objects.filter(pk__in=por_asignatura).values_list(
+            'pk', 'nombre', 'programa__coordinador_id'
+        )
+        for pk, nombre, coordinador_id in filas:
+            asignaturas[pk] = nombre
+            coordinadores[pk] = coordinador_id
+        salones = dict(
+            Salon.objects.filter(pk__in={c.salon_id for c in cambios}).values_list('pk', 'codigo')
+        )
+        cambio_por_horario = {c.horario_id: c for c in cambios}
+
+        notificaciones = []
+        destinatarios = []
+        for horarios, estudiantes in grupos.items():
+            cambios_grupo = sorted(
+                (cambio_por_horario[h] for h in horarios),
+                key=lambda c: (_ORDEN_DIAS.get(c.dia, 0), c.hora_inicio),
+            )
+            unico = cambios_grupo[0] if len(cambios_grupo) == 1 else None
+            notificaciones.append(Notificacion(
+                titulo="Cambios en tu horario" if unico is None else "Cambio en tu horario",
+                mensaje="\n".join(_describir(c, asignaturas, salones) for c in cambios_grupo),
+                tipo='HOR',
+                emisor_id=_emisor(cambios_grupo, coordinadores),
+                # No se enlaza `horario`: su FK en cascada borraría el aviso
+                # si la clase se elimina después.
+                asignatura_id=unico.asignatura_id if unico and unico.asignatura_id in asignaturas else None,
+            ))
+            destinatarios.append(estudiantes)
+
+        Notificacion.objects.bulk_create(notificaciones, batch_size=tamano_lote)
+        NotificacionUsuario.objects.bulk_create(
+            (
+                NotificacionUsuario(notificacion=notificacion, usuario_id=estudiante_id)
+                for notificacion, estudiantes in zip(notificaciones, destinatarios)
+                for estudiante_id in estudiantes
+            ),
+            batch_size=tamano_lote,
+        )
+        CambioHorario.objects.filter(pk__in=[c.pk for c in cambios]).delete()
+
+    return len(notificaciones), sum(len(e) for e in destinatarios)
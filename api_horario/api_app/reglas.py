@@ -0,0 +1,304 @@
+# api_app/reglas.py
+#
+# Motor de reglas de horario, configurable por Programa.
+#
+# Cada regla se declara una vez en REGLAS: a qué se aplica (clases de Horario o
+# matrículas), qué parámetros usa y cómo se compila. Los parámetros de un
+# programa son settings.REGLAS_HORARIO con lo que sobrescriba su ReglasPrograma
+# (en caché hasta que se edite). Cada juego de parámetros se compila una sola
+# vez a una tupla de validadores: funciones puras sobre una tupla y un índice
+# en memoria, sin consultas.
+#
+# El índice (IndiceCargas) trae de una vez las cargas guardadas de todos los
+# gestores/estudiantes de un lote y va sumando lo que el propio lote agrega.
+# Una escritura individual es un lote de uno: serializers, la importación por
+# lotes (horarios/importar) y el reporte de conflictos usan el mismo camino.
+#
+# Los límites de carga se vuelven a comprobar al guardar con los contadores de
+# api_app/cargas.py, que son los que los garantizan con escrituras
+# concurrentes; aquí se adelantan para devolver todos los errores juntos.
+
+from collections import namedtuple
+from datetime import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import CargaEstudiante, CargaGestorDia, Horario, ReglasPrograma
+
+DIAS = [codigo for codigo, _ in Horario.DIAS_SEMANA]
+TTL = 300
+
+# `anterior` es (gestor_id, dia) o (estudiante_id, semestre_id) de la fila que
+# se edita; None en altas. Si no cambia, la fila ya cuenta en la carga.
+Clase = namedtuple('Clase', 'clave programa_id gestor_id dia inicio fin anterior')
+Inscripcion = namedtuple('Inscripcion', 'clave programa_id estudiante_id semestre_id anterior')
+
+
+def _minuto(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _hora(minuto):
+    hora = time(minuto // 60, minuto % 60)
+    return hora.strftime('%I:%M %p').lstrip('0').lower().replace('am', 'a.m.').replace('pm', 'p.m.')
+
+
+# === Índice de cargas en memoria ===
+class IndiceCargas:
+    def __init__(self, clases_gestor=None, asignaturas_estudiante=None):
+        self.clases_gestor = clases_gestor or {}  # (gestor_id, dia) -> clases
+        self.asignaturas_estudiante = asignaturas_estudiante or {}  # (estudiante_id, semestre_id) -> asignaturas
+
+    @classmethod
+    def cargar(cls, clases=(), inscripciones=()):
+        # Una consulta por tipo de carga para todo el lote
+        gestores = {c.gestor_id for c in clases}
+        estudiantes = {i.estudiante_id for i in inscripciones}
+        semestres = {i.semestre_id for i in inscripciones}
+        clases_gestor = {}
+        if gestores:
+            clases_gestor = {
+                (gestor_id, dia): total for gestor_id, dia, total in
+                CargaGestorDia.objects.filter(gestor_id__in=gestores).values_list('gestor_id', 'dia', 'clases')
+            }
+        asignaturas_estudiante = {}
+        if estudiantes:
+            asignaturas_estudiante = {
+                (estudiante_id, semestre_id): total for estudiante_id, semestre_id, total in
+                CargaEstudiante.objects.filter(estudiante_id__in=estudiantes, semestre_id__in=semestres)
+                .values_list('estudiante_id', 'semestre_id', 'asignaturas')
+            }
+        return cls(clases_gestor, asignaturas_estudiante)
+
+    def agregar_clase(self, clase):
+        clave = (clase.gestor_id, clase.dia)
+        if clase.anterior != clave:
+            self.clases_gestor[clave] = self.clases_gestor.get(clave, 0) + 1
+            if clase.anterior:
+                self.clases_gestor[clase.anterior] = self.clases_gestor.get(clase.anterior, 1) - 1
+
+    def agregar_inscripcion(self, inscripcion):
+        clave = (inscripcion.estudiante_id, inscripcion.semestre_id)
+        if inscripcion.anterior != clave:
+            self.asignaturas_estudiante[clave] = self.asignaturas_estudiante.get(clave, 0) + 1
+            if inscripcion.anterior:
+                self.asignaturas_estudiante[inscripcion.anterior] = (
+                    self.asignaturas_estudiante.get(inscripcion.anterior, 1) - 1
+                )
+
+
+# === Reglas ===
+def _orden(p):
+    def validar(clase, indice):
+        if clase.fin <= clase.inicio:
+            return "La hora de fin debe ser mayor a la de inicio."
+    return validar
+
+
+def _duracion(p):
+    minimo, maximo = p['DURACION_MIN'], p['DURACION_MAX']
+    mensaje = f"La clase debe durar entre {minimo / 60:g} y {maximo / 60:g} horas."
+
+    def validar(clase, indice):
+        if clase.fin > clase.inicio and not minimo <= clase.fin - clase.inicio <= maximo:
+            return mensaje
+    return validar
+
+
+def _ventana(p):
+    apertura, cierre = p['HORA_APERTURA'], p['HORA_CIERRE']
+    mensaje = f"Las clases deben ser entre {_hora(apertura)} y {_hora(cierre)}"
+
+    def validar(clase, indice):
+        if clase.inicio < apertura or clase.fin > cierre:
+            return mensaje
+    return validar
+
+
+def _dias(p):
+    dias = frozenset(p['DIAS'])
+    mensaje = "Este programa solo tiene clases los días " + ", ".join(d for d in DIAS if d in dias) + "."
+
+    def validar(clase, indice):
+        if clase.dia not in dias:
+            return mensaje
+    return validar
+
+
+def _carga_gestor(p):
+    limite = p['MAX_CLASES_GESTOR_DIA']
+    mensaje = f"Un gestor no puede tener más de {limite} clases el mismo día"
+
+    def validar(clase, indice):
+        clave = (clase.gestor_id, clase.dia)
+        if clase.anterior != clave and indice.clases_gestor.get(clave, 0) >= limite:
+            return mensaje
+    return validar
+
+
+def _carga_estudiante(p):
+    limite = p['MAX_ASIGNATURAS_ESTUDIANTE']
+    mensaje = f"No puedes matricularte en más de {limite} asignaturas"
+
+    def validar(inscripcion, indice):
+        clave = (inscripcion.estudiante_id, inscripcion.semestre_id)
+        if inscripcion.anterior != clave and indice.asignaturas_estudiante.get(clave, 0) >= limite:
+            return mensaje
+    return validar
+
+
+# nombre -> (se aplica a, parámetros, compilador). El orden es el de los mensajes.
+REGLAS = {
+    'orden': ('horario', (), _orden),
+    'duracion': ('horario', ('DURACION_MIN', 'DURACION_MAX'), _duracion),
+    'ventana': ('horario', ('HORA_APERTURA', 'HORA_CIERRE'), _ventana),
+    'dias': ('horario', ('DIAS',), _dias),
+    'carga_gestor': ('horario', ('MAX_CLASES_GESTOR_DIA',), _carga_gestor),
+    'carga_estudiante': ('matricula', ('MAX_ASIGNATURAS_ESTUDIANTE',), _carga_estudiante),
+}
+
+
+@lru_cache(maxsize=256)
+def _compilar(parametros):
+    p = dict(parametros)
+    return {
+        ambito: tuple(compilador(p) for aplica, _, compilador in REGLAS.values() if aplica == ambito)
+        for ambito in ('horario', 'matricula')
+    }
+
+
+# === Parámetros por programa ===
+def _normalizar(valores):
+    # Horas a minutos y días a tupla: hashables y listos para comparar
+    for clave in ('HORA_APERTURA', 'HORA_CIERRE'):
+        valor = valores[clave]
+        valores[clave] = _minuto(time.fromisoformat(valor) if isinstance(valor, str) else valor)
+    valores['DIAS'] = tuple(valores['DIAS'])
+    return valores
+
+
+def campos():
+    # Campos de ReglasPrograma que sobrescriben cada clave de REGLAS_HORARIO
+    return [clave.lower() for clave in settings.REGLAS_HORARIO]
+
+
+def combinar(propias):
+    # settings.REGLAS_HORARIO con los valores no vacíos de `propias` ({campo: valor})
+    valores = dict(settings.REGLAS_HORARIO)
+    for campo, valor in propias.items():
+        if valor is not None:
+            valores[campo.upper()] = valor
+    return _normalizar(valores)
+
+
+def parametros_de(programa_ids):
+    # {programa_id: parámetros}; los que no están en caché salen en una consulta
+    claves = {programa_id: ReglasPrograma.CLAVE_CACHE.format(programa_id) for programa_id in programa_ids}
+    en_cache = cache.get_many(claves.values())
+    resultado = {pk: en_cache[clave] for pk, clave in claves.items() if clave in en_cache}
+    faltantes = [pk for pk in claves if pk not in resultado]
+    if faltantes:
+        propias = {
+            fila.pop('programa_id'): fila
+            for fila in ReglasPrograma.objects.filter(programa_id__in=faltantes).values('programa_id', *campos())
+        }
+        nuevos = {pk: combinar(propias.get(pk, {})) for pk in faltantes}
+        cache.set_many({claves[pk]: valores for pk, valores in nuevos.items()}, TTL)
+        resultado.update(nuevos)
+    return resultado
+
+
+def parametros(programa_id):
+    return parametros_de([programa_id])[programa_id]
+
+
+def limite_mas_permisivo(programa_ids, clave):
+    # Quien cursa asignaturas de varios programas recibe el mayor de sus
+    # límites, como en el reporte de conflictos
+    valores = [p[clave] for p in parametros_de(programa_ids).values()]
+    return max(valores) if valores else settings.REGLAS_HORARIO[clave]
+
+
+def presentar(valores):
+    # Parámetros con los nombres y formatos de ReglasPrograma, para la API
+    resultado = {}
+    for clave, valor in valores.items():
+        if clave.startswith('HORA_'):
+            valor = f'{valor // 60:02d}:{valor % 60:02d}'
+        elif clave == 'DIAS':
+            valor = list(valor)
+        resultado[clave.lower()] = valor
+    return resultado
+
+
+def reglas_de(programa_ids):
+    # {programa_id: {'horario': validadores, 'matricula': validadores}}
+    return {
+        programa_id: _compilar(tuple(sorted(valores.items())))
+        for programa_id, valores in parametros_de(programa_ids).items()
+    }
+
+
+# === Validación por lotes ===
+def validar_clases(clases, indice=None):
+    # {clave: [mensajes]} de las clases que incumplen alguna regla. Las válidas
+    # se suman al índice, así que el lote se valida como si se guardara en orden.
+    clases = list(clases)
+    reglas = reglas_de({c.programa_id for c in clases})
+    indice = indice or IndiceCargas.cargar(clases=clases)
+    errores = {}
+    for clase in clases:
+        mensajes = [m for m in (v(clase, indice) for v in reglas[clase.programa_id]['horario']) if m]
+        if mensajes:
+            errores[clase.clave] = mensajes
+        else:
+            indice.agregar_clase(clase)
+    return errores
+
+
+def validar_inscripciones(inscripciones, indice=None):
+    inscripciones = list(inscripciones)
+    reglas = reglas_de({i.programa_id for i in inscripciones})
+    indice = indice or IndiceCargas.cargar(inscripciones=inscripciones)
+    errores = {}
+    for inscripcion in inscripciones:
+        mensajes = [m for m in (v(inscripcion, indice) for v in reglas[inscripcion.programa_id]['matricula']) if m]
+        if mensajes:
+            errores[inscripcion.clave] = mensajes
+        else:
+            indice.agregar_inscripcion(inscripcion)
+    return errores
+
+
+# === Construcción desde datos de serializer ===
+def clase_desde_datos(datos, instancia=None, clave=0):
+    # `datos` son los validated_data de HorarioSerializer; en ediciones
+    # parciales lo que falta se toma de la instancia
+    def valor(campo):
+        return datos[campo] if campo in datos else getattr(instancia, campo)
+
+    gestor = valor('gestor')
+    return Clase(
+        clave=clave,
+        programa_id=valor('asignatura').programa_id,
+        gestor_id=gestor.pk,
+        dia=valor('dia'),
+        inicio=_minuto(valor('hora_inicio')),
+        fin=_minuto(valor('hora_fin')),
+        anterior=(instancia.gestor_id, instancia.dia) if instancia is not None else None,
+    )
+
+
+def inscripcion_desde_datos(datos, instancia=None, clave=0):
+    def valor(campo):
+        return datos[campo] if campo in datos else getattr(instancia, campo)
+
+    return Inscripcion(
+        clave=clave,
+        programa_id=valor('asignatura').programa_id,
+        estudiante_id=valor('estudiante').pk,
+        semestre_id=valor('semestre').codigo,
+        anterior=(instancia.estudiante_id, instancia.semestre_id) if instancia is not None else None,
+    )
@@ -0,0 +1,100 @@
+# api_app/replicas.py
+#
+# Enrutamiento de lecturas a réplicas.
+#
+# - Todas las escrituras van a 'default' (primaria).
+# - Los ViewSets con `LecturaReplicaMixin` leen de una réplica en GET/HEAD/OPTIONS,
+#   pero autenticación y permisos se resuelven antes, contra la primaria.
+# - Tras una escritura exitosa el usuario queda fijado a la primaria durante
+#   REPLICA_FIJACION_SEGUNDOS para que lea sus propios cambios.
+#
+# La fijación se guarda en la caché de Django: con varios workers debe ser una
+# caché compartida (Redis/Memcached), no la LocMemCache por defecto.
+
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_estado = threading.local()
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _clave_fijacion(usuario_id):
+    return f'replica:fijado:{usuario_id}'
+
+
+def fijar_a_primaria(usuario):
+    cache.set(
+        _clave_fijacion(usuario.pk), 1,
+        getattr(settings, 'REPLICA_FIJACION_SEGUNDOS', 10),
+    )
+
+
+def esta_fijado(usuario):
+    return bool(usuario.is_authenticated and cache.get(_clave_fijacion(usuario.pk)))
+
+
+def usar_replica(alias):
+    _estado.alias = alias
+
+
+def usar_primaria():
+    _estado.alias = None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return getattr(_estado, 'alias', None) or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplicas tienen los mismos datos
+        alias = {'default', *_replicas()}
+        if obj1._state.db in alias and obj2._state.db in alias:
+            return True
+        return None
+
+
+class LecturaReplicaMixin:
+    # Para ViewSets de solo lectura intensiva (horarios, catálogo, buscador)
+    def initial(self, request, *args, **kwargs):
+        usar_primaria()
+        super().initial(request, *args, **kwargs)  # autenticación y permisos en la primaria
+        replicas = _replicas()
+        if replicas and request.method in SAFE_METHODS and not esta_fijado(request.user):
+            usar_replica(random.choice(replicas))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        usar_primaria()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            # Nunca dejar el hilo apuntando a una réplica para el siguiente request
+            usar_primaria()
+
+        # DRF copia el usuario autenticado (JWT) al HttpRequest subyacente
+        usuario = getattr(request, 'user', None)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and usuario is not None
+            and usuario.is_authenticated
+        ):
+            fijar_a_primaria(usuario)
+        return response
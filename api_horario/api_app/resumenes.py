@@ -0,0 +1,227 @@
+# api_app/resumenes.py
+#
+# Analítica por Programa para coordinadores, servida desde tablas de resumen.
+#
+# - `calcular_en_vivo()` agrega directamente sobre Matricula y Horario. Es la
+#   línea base (comando `refrescar_resumenes --benchmark`) y la fuente de cada
+#   refresco.
+# - Las escrituras de Asignatura/Horario/Matricula solo marcan el programa como
+#   pendiente (un UPDATE); `refrescar_resumenes` (cron) recalcula únicamente los
+#   programas pendientes y reemplaza sus filas de resumen.
+# - `leer()` arma el tablero desde los resúmenes y lo guarda en caché hasta el
+#   siguiente refresco de ese programa. La respuesta dice cuándo se calcularon
+#   (`actualizado`) y si hubo escrituras posteriores aún sin incorporar
+#   (`pendiente`).
+
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from . import reglas
+from .models import (
+    Asignatura, Horario, Matricula, ResumenCreditosEstudiante, ResumenHorasGestor,
+    ResumenMatriculaAsignatura, ResumenPrograma, ResumenUsoSalon, Salon, Semestre, Usuario,
+)
+
+def _clave_cache(programa_id):
+    return f'analitica:programa:{programa_id}'
+
+
+def marcar_pendiente(programa_id):
+    # Solo UPDATE: un programa sin resumen todavía se calcula en su primera lectura.
+    # Si ya estaba pendiente no escribe nada.
+    ResumenPrograma.objects.filter(programa_id=programa_id, pendiente=False).update(pendiente=True)
+
+
+def marcar_pendiente_por_asignatura(asignatura_id):
+    ResumenPrograma.objects.filter(
+        programa__asignaturas=asignatura_id, pendiente=False
+    ).update(pendiente=True)
+
+
+def _minutos(inicio, fin):
+    return (fin.hour * 60 + fin.minute) - (inicio.hour * 60 + inicio.minute)
+
+
+# === Agregación en vivo (línea base) ===
+def calcular_en_vivo(programa_id):
+    semestre = Semestre.codigo_actual() or ''
+    filtro_semestre = {'semestre_id': semestre} if semestre else {}
+
+    conteo = Count('matricula', filter=Q(matricula__semestre_id=semestre)) if semestre else Count('matricula')
+    matricula = [
+        {'asignatura': pk, 'matriculados': total}
+        for pk, total in Asignatura.objects.filter(programa_id=programa_id)
+        .annotate(total=conteo).order_by('codigo').values_list('pk', 'total')
+    ]
+
+    uso = defaultdict(lambda: [0, 0])
+    gestores = defaultdict(lambda: [0, 0])
+    horarios = Horario.objects.filter(asignatura__programa_id=programa_id).values_list(
+        'salon_id', 'dia', 'gestor_id', 'hora_inicio', 'hora_fin'
+    )
+    for salon_id, dia, gestor_id, inicio, fin in horarios:
+        minutos = _minutos(inicio, fin)
+        uso[(salon_id, dia)][0] += 1
+        uso[(salon_id, dia)][1] += minutos
+        gestores[gestor_id][0] += 1
+        gestores[gestor_id][1] += minutos
+
+    creditos = Counter(
+        fila['creditos'] for fila in Matricula.objects.filter(
+            asignatura__programa_id=programa_id, **filtro_semestre
+        ).values('estudiante_id').annotate(creditos=Sum('asignatura__creditos')).order_by()
+    )
+
+    return {
+        'semestre': semestre,
+        'matricula': matricula,
+        'uso_salones': [
+            {'salon': salon_id, 'dia': dia, 'clases': clases, 'minutos': minutos}
+            for (salon_id, dia), (clases, minutos) in sorted(uso.items())
+        ],
+        'gestores': [
+            {'gestor': gestor_id, 'clases': clases, 'minutos': minutos}
+            for gestor_id, (clases, minutos) in sorted(gestores.items())
+        ],
+        'creditos': [
+            {'creditos': valor, 'estudiantes': total} for valor, total in sorted(creditos.items())
+        ],
+    }
+
+
+# === Refresco de los resúmenes ===
+def refrescar(programa_ids):
+    for programa_id in programa_ids:
+        datos = calcular_en_vivo(programa_id)
+        with transaction.atomic():
+            for modelo in (ResumenMatriculaAsignatura, ResumenUsoSalon, ResumenHorasGestor, ResumenCreditosEstudiante):
+                modelo.objects.filter(programa_id=programa_id).delete()
+            ResumenMatriculaAsignatura.objects.bulk_create([
+                ResumenMatriculaAsignatura(programa_id=programa_id, asignatura_id=f['asignatura'], matriculados=f['matriculados'])
+                for f in datos['matricula']
+            ])
+            ResumenUsoSalon.objects.bulk_create([
+                ResumenUsoSalon(programa_id=programa_id, salon_id=f['salon'], dia=f['dia'], clases=f['clases'], minutos=f['minutos'])
+                for f in datos['uso_salones']
+            ])
+            ResumenHorasGestor.objects.bulk_create([
+                ResumenHorasGestor(programa_id=programa_id, gestor_id=f['gestor'], clases=f['clases'], minutos=f['minutos'])
+                for f in datos['gestores']
+            ])
+            ResumenCreditosEstudiante.objects.bulk_create([
+                ResumenCreditosEstudiante(programa_id=programa_id, creditos=f['creditos'], estudiantes=f['estudiantes'])
+                for f in datos['creditos']
+            ])
+            ResumenPrograma.objects.update_or_create(
+                programa_id=programa_id,
+                defaults={'semestre': datos['semestre'], 'pendiente': False, 'actualizado': timezone.now()},
+            )
+        cache.delete(_clave_cache(programa_id))
+
+
+def programas_pendientes():
+    return list(ResumenPrograma.objects.filter(pendiente=True).values_list('programa_id', flat=True))
+
+
+# === Lectura para los tableros ===
+def _leer_resumenes(programa_id):
+    return {
+        'matricula': list(
+            ResumenMatriculaAsignatura.objects.filter(programa_id=programa_id)
+            .values('asignatura', 'matriculados').order_by('asignatura__codigo')
+        ),
+        'uso_salones': list(
+            ResumenUsoSalon.objects.filter(programa_id=programa_id)
+            .values('salon', 'dia', 'clases', 'minutos').order_by('salon', 'dia')
+        ),
+        'gestores': list(
+            ResumenHorasGestor.objects.filter(programa_id=programa_id)
+            .values('gestor', 'clases', 'minutos').order_by('gestor')
+        ),
+        'creditos': list(
+            ResumenCreditosEstudiante.objects.filter(programa_id=programa_id)
+            .values('creditos', 'estudiantes').order_by('creditos')
+        ),
+    }
+
+
+def presentar(datos, programa_id):
+    # Resuelve nombres y deriva totales por edificio y horas por gestor. La
+    # ocupación de un salón es sobre la franja diaria en que el programa puede
+    # tener clases (HORA_APERTURA-HORA_CIERRE de sus reglas).
+    p = reglas.parametros(programa_id)
+    minutos_franja = p['HORA_CIERRE'] - p['HORA_APERTURA']
+    asignaturas = {
+        pk: (codigo, nombre) for pk, codigo, nombre in
+        Asignatura.objects.filter(pk__in=[f['asignatura'] for f in datos['matricula']])
+        .values_list('pk', 'codigo', 'nombre')
+    }
+    salones = {
+        pk: (codigo, edificio) for pk, codigo, edificio in
+        Salon.objects.filter(pk__in={f['salon'] for f in datos['uso_salones']})
+        .values_list('pk', 'codigo', 'edificio')
+    }
+    gestores = {
+        usuario.pk: usuario.get_full_name() or usuario.username
+        for usuario in Usuario.objects.filter(pk__in=[f['gestor'] for f in datos['gestores']])
+        .only('first_name', 'last_name', 'username')
+    }
+
+    edificios = defaultdict(lambda: {'clases': 0, 'minutos': 0})
+    uso_salones = []
+    for fila in datos['uso_salones']:
+        codigo, edificio = salones.get(fila['salon'], ('', ''))
+        uso_salones.append({
+            **fila, 'codigo': codigo, 'edificio': edificio,
+            'ocupacion': round(fila['minutos'] / minutos_franja, 3),
+        })
+        edificios[(edificio, fila['dia'])]['clases'] += fila['clases']
+        edificios[(edificio, fila['dia'])]['minutos'] += fila['minutos']
+
+    return {
+        'matricula_por_asignatura': [
+            {**fila, 'codigo': asignaturas.get(fila['asignatura'], ('', ''))[0],
+             'nombre': asignaturas.get(fila['asignatura'], ('', ''))[1]}
+            for fila in datos['matricula']
+        ],
+        'uso_salones': uso_salones,
+        'uso_edificios': [
+            {'edificio': edificio, 'dia': dia, **totales}
+            for (edificio, dia), totales in sorted(edificios.items())
+        ],
+        'horas_gestores': [
+            {**fila, 'nombre': gestores.get(fila['gestor'], ''), 'horas': round(fila['minutos'] / 60, 2)}
+            for fila in datos['gestores']
+        ],
+        'distribucion_creditos': datos['creditos'],
+    }
+
+
+def leer(programa_id):
+    # El estado se consulta en cada lectura (una fila por clave): la caché no
+    # se entera de marcar_pendiente
+    estado = ResumenPrograma.objects.filter(programa_id=programa_id).values(
+        'semestre', 'pendiente', 'actualizado'
+    ).first()
+    if estado is None or estado['actualizado'] is None:
+        # Primera consulta del programa: se calcula una vez y queda guardado
+        refrescar([programa_id])
+        estado = ResumenPrograma.objects.filter(programa_id=programa_id).values(
+            'semestre', 'pendiente', 'actualizado'
+        ).get()
+
+    clave = _clave_cache(programa_id)
+    tablero = cache.get(clave)
+    if tablero is None or tablero['actualizado'] != estado['actualizado']:
+        tablero = {
+            'programa': programa_id,
+            'semestre': estado['semestre'],
+            'actualizado': estado['actualizado'],
+            **presentar(_leer_resumenes(programa_id), programa_id),
+        }
+        cache.set(clave, tablero, 300)
+    return {**tablero, 'pendiente': estado['pendiente']}
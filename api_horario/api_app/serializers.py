@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
-from datetime import time  
 from .models import (
     Usuario, Programa, Asignatura, Salon,
     Horario, Matricula, Notificacion,
-    NotificacionUsuario, ConfiguracionUsuario
+    NotificacionUsuario, ConfiguracionUsuario,
+    Semestre, MatriculaHistorica, ReporteConflictos, ConflictoMatricula,
+    ReglasPrograma
 )
+from . import reglas
 from django.contrib.auth.hashers import make_password
 
 # === Serializer para Usuario (Custom User) ===
@@ -53,6 +55,34 @@ class ProgramaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("El código debe ser alfanumérico.")
         return value
 
+# === Serializer para las reglas de horario de un Programa ===
+class ReglasProgramaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReglasPrograma
+        fields = [
+            'duracion_min', 'duracion_max', 'hora_apertura', 'hora_cierre', 'dias',
+            'max_clases_gestor_dia', 'max_asignaturas_estudiante', 'max_clases_estudiante_dia',
+            'actualizado'
+        ]
+        read_only_fields = ['actualizado']
+
+    def validate_dias(self, value):
+        if value is not None and (
+            not isinstance(value, list) or not value or not set(value) <= set(reglas.DIAS)
+        ):
+            raise serializers.ValidationError(f"Debe ser una lista no vacía de: {', '.join(reglas.DIAS)}.")
+        return value
+
+    def validate(self, data):
+        # Coherencia de los valores efectivos: propios, editados o heredados
+        propias = {campo: getattr(self.instance, campo) for campo in reglas.campos()} if self.instance else {}
+        efectivos = reglas.combinar({**propias, **data})
+        if efectivos['DURACION_MIN'] > efectivos['DURACION_MAX']:
+            raise serializers.ValidationError("La duración mínima no puede superar a la máxima.")
+        if efectivos['HORA_APERTURA'] >= efectivos['HORA_CIERRE']:
+            raise serializers.ValidationError("La hora de apertura debe ser anterior a la de cierre.")
+        return data
+
 # === Serializer para Asignatura ===
 class AsignaturaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -75,7 +105,7 @@ class SalonSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La capacidad mínima es 10.")
         return value
 
-# === Serializer para Horario (con validaciones de tiempo) ===
+# === Serializer para Horario (reglas del programa en api_app/reglas.py) ===
 class HorarioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Horario
@@ -85,38 +115,111 @@ class HorarioSerializer(serializers.ModelSerializer):
         ]
     
     def validate(self, data):
-        # Validación: Hora fin > Hora inicio
-        if data['hora_fin'] <= data['hora_inicio']:
-            raise serializers.ValidationError("La hora de fin debe ser mayor a la de inicio.")
-        
-        # Validación: Duración entre 2 y 3 horas
-        duracion = data['hora_fin'] - data['hora_inicio']
-        if not (time(2, 0) <= duracion <= time(3, 0)):
-            raise serializers.ValidationError("La clase debe durar entre 2 y 3 horas.")
-        
-        # Validación: Horario entre 7:00 a.m. y 6:00 p.m.
-        if data['hora_inicio'] < time(7, 0) or data['hora_fin'] > time(18, 0):
-            raise serializers.ValidationError("Las clases deben ser entre 7:00 a.m. y 6:00 p.m.")
-        
+        # En lotes (HorarioViewSet.importar) las reglas se evalúan juntas después
+        if self.context.get('reglas_en_lote'):
+            return data
+        clase = reglas.clase_desde_datos(data, self.instance)
+        errores = reglas.validar_clases([clase])
+        if errores:
+            raise serializers.ValidationError(errores[clase.clave])
         return data
 
+# === Serializer para la semana del estudiante (nombres resueltos) ===
+class HorarioSemanaSerializer(serializers.ModelSerializer):
+    asignatura_codigo = serializers.CharField(source='asignatura.codigo', read_only=True)
+    asignatura_nombre = serializers.CharField(source='asignatura.nombre', read_only=True)
+    salon_codigo = serializers.CharField(source='salon.codigo', read_only=True)
+    edificio = serializers.CharField(source='salon.edificio', read_only=True)
+
+    class Meta:
+        model = Horario
+        fields = [
+            'id', 'asignatura', 'asignatura_codigo', 'asignatura_nombre',
+            'salon', 'salon_codigo', 'edificio', 'gestor', 'dia',
+            'hora_inicio', 'hora_fin'
+        ]
+
+# === Serializer para el horario del gestor (con matriculados por clase) ===
+class HorarioGestorSerializer(HorarioSemanaSerializer):
+    matriculados = serializers.IntegerField(read_only=True)
+
+    class Meta(HorarioSemanaSerializer.Meta):
+        fields = HorarioSemanaSerializer.Meta.fields + ['matriculados']
+
+# === Serializer para Semestre ===
+class SemestreSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Semestre
+        fields = ['id', 'codigo', 'fecha_inicio', 'fecha_fin', 'actual', 'cerrado']
+
 # === Serializer para Matrícula ===
 class MatriculaSerializer(serializers.ModelSerializer):
+    # Por código ('2025-1'); si se omite se usa el semestre actual
+    semestre = serializers.SlugRelatedField(
+        slug_field='codigo', queryset=Semestre.objects.filter(cerrado=False), required=False
+    )
+
     class Meta:
         model = Matricula
-        fields = ['id', 'estudiante', 'asignatura', 'programa', 'semestre']
+        fields = ['id', 'estudiante', 'asignatura', 'semestre']
+        # El UniqueTogetherValidator haría obligatorio `semestre`; validate() revisa
+        # la unicidad con el semestre actual por defecto
+        validators = []
     
     def validate(self, data):
-        # Validación: Estudiante no repetir asignatura
-        if Matricula.objects.filter(estudiante=data['estudiante'], asignatura=data['asignatura']).exists():
+        if 'semestre' not in data and self.instance is None:
+            codigo = Semestre.codigo_actual()
+            if codigo is None:
+                raise serializers.ValidationError("No hay un semestre actual configurado.")
+            data['semestre'] = Semestre.objects.get(codigo=codigo)
+
+        # Validación: Estudiante no repetir asignatura en el semestre. En ediciones
+        # parciales lo que falta se toma de la instancia, que no cuenta como duplicada.
+        estudiante = data.get('estudiante', getattr(self.instance, 'estudiante', None))
+        asignatura = data.get('asignatura', getattr(self.instance, 'asignatura', None))
+        semestre = data.get('semestre', getattr(self.instance, 'semestre', None))
+        duplicadas = Matricula.objects.del_semestre(semestre.codigo).filter(
+            estudiante=estudiante, asignatura=asignatura
+        )
+        if self.instance is not None:
+            duplicadas = duplicadas.exclude(pk=self.instance.pk)
+        if duplicadas.exists():
             raise serializers.ValidationError("El estudiante ya está matriculado en esta asignatura.")
         
-        # Validación: Límite de 8 asignaturas
-        if Matricula.objects.filter(estudiante=data['estudiante']).count() >= 8:
-            raise serializers.ValidationError("El estudiante no puede matricular más de 8 asignaturas.")
-        
+        # Validación: límite de asignaturas del programa (api_app/reglas.py); el
+        # contador CargaEstudiante lo vuelve a aplicar al guardar
+        inscripcion = reglas.inscripcion_desde_datos(data, self.instance)
+        errores = reglas.validar_inscripciones([inscripcion])
+        if errores:
+            raise serializers.ValidationError(errores[inscripcion.clave])
+
         return data
 
+# === Serializer para Matrículas archivadas (solo lectura) ===
+class MatriculaHistoricaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MatriculaHistorica
+        fields = ['id', 'matricula_id', 'estudiante', 'asignatura', 'semestre', 'fecha_archivo']
+        read_only_fields = fields
+
+# === Serializers para el reporte de conflictos de matrícula (solo lectura) ===
+class ReporteConflictosSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReporteConflictos
+        fields = [
+            'id', 'semestre', 'estado', 'iniciado', 'terminado',
+            'estudiantes', 'con_conflictos', 'segundos'
+        ]
+        read_only_fields = fields
+
+class ConflictoMatriculaSerializer(serializers.ModelSerializer):
+    estudiante_usuario = serializers.CharField(source='estudiante.username', read_only=True)
+
+    class Meta:
+        model = ConflictoMatricula
+        fields = ['id', 'estudiante', 'estudiante_usuario', 'tipo', 'dia', 'asignaturas', 'programas']
+        read_only_fields = fields
+
 # === Serializer para Notificaciones ===
 class NotificacionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -125,6 +228,8 @@ class NotificacionSerializer(serializers.ModelSerializer):
             'id', 'titulo', 'mensaje', 'tipo', 'emisor', 
             'fecha_envio', 'asignatura', 'horario'
         ]
+        # El modelo admite emisor nulo solo para los avisos automáticos
+        extra_kwargs = {'emisor': {'required': True, 'allow_null': False}}
 
 # === Serializer para NotificacionesUsuario ===
 class NotificacionUsuarioSerializer(serializers.ModelSerializer):
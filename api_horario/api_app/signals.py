@@ -0,0 +1,163 @@
+# api_app/signals.py
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cargas import (
+    liberar_asignatura_estudiante, liberar_clase_gestor,
+    reservar_asignatura_estudiante, reservar_clase_gestor,
+)
+from .catalogo import MODELOS as MODELOS_CATALOGO, registrar_cambio as registrar_cambio_catalogo
+from .models import Asignatura, Horario, Matricula
+from .notificaciones import registrar_cambio_horario
+from .reglas import parametros
+from .resumenes import marcar_pendiente, marcar_pendiente_por_asignatura
+from .gestores import asignatura_modificada, invalidar_gestor
+
+
+# === Notificaciones automáticas de cambios de Horario ===
+@receiver(post_save, sender=Horario)
+def horario_guardado(sender, instance, created, raw=False, **kwargs):
+    # Las clases nuevas no afectan a nadie todavía; solo se avisan ediciones
+    if created or raw:
+        return
+    registrar_cambio_horario(instance, 'MOD')
+
+
+@receiver(post_delete, sender=Horario)
+def horario_eliminado(sender, instance, **kwargs):
+    registrar_cambio_horario(instance, 'ELI')
+
+
+# === Contadores de carga (límites por gestor/día y por estudiante) ===
+def _valores_anteriores(instance, campos):
+    # Solo en ediciones: una consulta para saber qué cupo liberar
+    if instance._state.adding or instance.pk is None:
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values_list(*campos).first()
+
+
+@receiver(pre_save, sender=Horario)
+def reservar_carga_gestor(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'gestor', 'dia'} & set(update_fields)):
+        return
+    anterior = _valores_anteriores(instance, ('gestor_id', 'dia'))
+    if anterior == (instance.gestor_id, instance.dia):
+        return
+    limite = parametros(instance.asignatura.programa_id)['MAX_CLASES_GESTOR_DIA']
+    reservar_clase_gestor(instance.gestor_id, instance.dia, limite)
+    if anterior:
+        liberar_clase_gestor(*anterior)
+
+
+@receiver(post_delete, sender=Horario)
+def liberar_carga_gestor(sender, instance, **kwargs):
+    liberar_clase_gestor(instance.gestor_id, instance.dia)
+
+
+@receiver(pre_save, sender=Matricula)
+def reservar_carga_estudiante(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'estudiante', 'semestre'} & set(update_fields)):
+        return
+    anterior = _valores_anteriores(instance, ('estudiante_id', 'semestre_id'))
+    if anterior == (instance.estudiante_id, instance.semestre_id):
+        return
+    limite = parametros(instance.asignatura.programa_id)['MAX_ASIGNATURAS_ESTUDIANTE']
+    reservar_asignatura_estudiante(instance.estudiante_id, instance.semestre_id, limite)
+    if anterior:
+        liberar_asignatura_estudiante(*anterior)
+
+
+@receiver(post_delete, sender=Matricula)
+def liberar_carga_estudiante(sender, instance, **kwargs):
+    liberar_asignatura_estudiante(instance.estudiante_id, instance.semestre_id)
+
+
+# === Registro de cambios del catálogo (sincronización offline) ===
+def catalogo_guardado(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        registrar_cambio_catalogo(instance, 'I' if created else 'U')
+
+
+def catalogo_eliminado(sender, instance, **kwargs):
+    registrar_cambio_catalogo(instance, 'D')
+
+
+for _modelo in MODELOS_CATALOGO:
+    post_save.connect(catalogo_guardado, sender=_modelo, dispatch_uid=f'catalogo_guardado_{_modelo.__name__}')
+    post_delete.connect(catalogo_eliminado, sender=_modelo, dispatch_uid=f'catalogo_eliminado_{_modelo.__name__}')
+
+
+@receiver(m2m_changed, sender=Asignatura.gestores.through)
+def gestores_asignatura_cambiados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        registrar_cambio_catalogo(instance, 'U')
+        return
+    # Cambio desde el lado del gestor: cada asignatura afectada cambia
+    for asignatura in Asignatura.objects.filter(pk__in=pk_set or ()):
+        registrar_cambio_catalogo(asignatura, 'U')
+
+
+# === Resúmenes de analítica: marcar el programa afectado como pendiente ===
+@receiver(post_save, sender=Asignatura)
+@receiver(post_delete, sender=Asignatura)
+def asignatura_cambiada_resumen(sender, instance, raw=False, **kwargs):
+    if not raw:
+        marcar_pendiente(instance.programa_id)
+
+
+@receiver(post_save, sender=Horario)
+@receiver(post_delete, sender=Horario)
+@receiver(post_save, sender=Matricula)
+@receiver(post_delete, sender=Matricula)
+def carga_cambiada_resumen(sender, instance, raw=False, **kwargs):
+    if not raw:
+        marcar_pendiente_por_asignatura(instance.asignatura_id)
+
+
+@receiver(pre_save, sender=Asignatura)
+@receiver(pre_save, sender=Horario)
+@receiver(pre_save, sender=Matricula)
+def padre_cambiado_resumen(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Al mover una fila a otra asignatura (o una asignatura a otro programa) el
+    # programa anterior también cambia; post_save solo ve el nuevo
+    campo = 'programa' if sender is Asignatura else 'asignatura'
+    if raw or instance._state.adding or (update_fields is not None and campo not in update_fields):
+        return
+    anterior = sender.objects.filter(pk=instance.pk).values_list(f'{campo}_id', flat=True).first()
+    if anterior is None or anterior == getattr(instance, f'{campo}_id'):
+        return
+    if sender is Asignatura:
+        marcar_pendiente(anterior)
+    else:
+        marcar_pendiente_por_asignatura(anterior)
+
+
+# === Caché del horario de cada gestor ===
+@receiver(pre_save, sender=Horario)
+def horario_cambia_de_gestor(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    anterior = Horario.objects.filter(pk=instance.pk).values_list('gestor_id', flat=True).first()
+    if anterior and anterior != instance.gestor_id:
+        transaction.on_commit(lambda: invalidar_gestor(anterior))
+
+
+@receiver(post_save, sender=Horario)
+@receiver(post_delete, sender=Horario)
+def horario_cambiado_gestor(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # Al confirmar: antes, una lectura concurrente volvería a cachear lo viejo
+        gestor_id = instance.gestor_id
+        transaction.on_commit(lambda: invalidar_gestor(gestor_id))
+
+
+@receiver(post_save, sender=Matricula)
+@receiver(post_delete, sender=Matricula)
+def matricula_cambiada_gestor(sender, instance, raw=False, **kwargs):
+    if not raw:
+        asignatura_id = instance.asignatura_id
+        transaction.on_commit(lambda: asignatura_modificada(asignatura_id))
@@ -1,3 +1,856 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import time, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from . import catalogo, conflictos, gestores, metricas, resumenes
+from .notificaciones import entregar_cambios_horario
+from .admision import ConcurrenciaMixin, MemoriaBackend, backend
+from .cargas import LimiteExcedido, reconciliar_cargas
+from .models import (
+    Asignatura, CambioCatalogo, CambioHorario, CargaEstudiante, CargaGestorDia, ClaveIdempotencia, Horario, Matricula, MatriculaHistorica,
+    Notificacion, NotificacionUsuario, Programa, ReglasPrograma, ResumenPrograma, Salon, Semestre, Usuario,
+)
+
+
+class _VistaQueFalla(ConcurrenciaMixin, APIView):
+    clase_admision = 'prueba'
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = []
+
+    def get(self, request):
+        raise RuntimeError("fallo no controlado")
+
+
+@override_settings(ADMISION={'BACKEND': 'api_app.admision.MemoriaBackend', 'CONCURRENCIA': {'prueba': 1}})
+class ConcurrenciaTests(SimpleTestCase):
+    def test_libera_el_cupo_tras_un_error_no_controlado(self):
+        vista = _VistaQueFalla.as_view()
+        for _ in range(2):
+            # Con límite 1, el segundo intento daría 503 si el primero no liberara
+            with self.assertRaises(RuntimeError):
+                vista(APIRequestFactory().get('/'))
+            self.assertEqual(backend()._en_curso['prueba'], 0)
+
+    def test_poda_los_buckets_inactivos(self):
+        memoria = MemoriaBackend()
+        with mock.patch('api_app.admision.time.monotonic', return_value=1000):
+            memoria._ultima_poda = 1000
+            self.assertEqual(memoria.tomar('ES:1', 2, 1), 0)
+            self.assertEqual(memoria.tomar('ES:1', 2, 1), 0)
+            self.assertEqual(memoria.tomar('ES:1', 2, 1), 1)
+            memoria.tomar('ES:2', 10, 0.01)
+        # A los 2 s ES:1 ya se rellenó, pero la poda espera a PODA_CADA
+        with mock.patch('api_app.admision.time.monotonic', return_value=1002):
+            memoria.tomar('CO:1', 2, 1)
+        self.assertIn('ES:1', memoria._buckets)
+        with mock.patch('api_app.admision.time.monotonic', return_value=1000 + MemoriaBackend.PODA_CADA):
+            self.assertEqual(memoria.tomar('CO:1', 2, 1), 0)
+        # ES:2 (10 tokens a 0.01/s) sigue sin rellenarse y conserva su estado
+        self.assertEqual(set(memoria._buckets), {'ES:2', 'CO:1'})
+
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginThrottleTests(TestCase):
+    def intentar(self, usuario):
+        return self.client.post('/api/token/', {'username': usuario, 'password': 'incorrecta'}).status_code
+
+    def test_muchos_usuarios_desde_una_ip(self):
+        # Todo el campus sale por la misma IP: no cuenta contra el bucket anónimo
+        estados = {self.intentar(f'nat-{i}') for i in range(30)}
+        self.assertEqual(estados, {401})
+
+    def test_limita_intentos_por_usuario(self):
+        estados = [self.intentar('fuerza-bruta') for _ in range(11)]
+        self.assertEqual(estados, [401] * 10 + [429])
+        self.assertEqual(self.intentar('otro-usuario'), 401)
+
+
+class MetricasTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+        ajustes = override_settings(METRICAS_DIR=directorio.name, METRICAS_INTERVALO=0)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_pliega_los_archivos_de_procesos_terminados(self):
+        terminado = subprocess.Popen([sys.executable, '-c', 'pass'])
+        terminado.wait()
+        serie = {**metricas._serie_vacia(), 'peticiones': {'200': 3}, 'duracion_cuenta': 3}
+        (self.directorio / f'metricas-{terminado.pid}-1-1.json').write_text(
+            json.dumps([{'ruta': 'horario-list', 'metodo': 'GET', **serie}])
+        )
+        metricas.registrar('horario-list', 'GET', 200, 0.01, 0.0, 10)
+
+        linea = 'api_requests_total{route="horario-list",method="GET",status="200"}'
+        for _ in range(2):
+            self.assertIn(f'{linea} 4\n', metricas.exponer())
+        archivos = sorted(a.name for a in self.directorio.glob('*.json'))
+        self.assertEqual(len(archivos), 2)
+        self.assertIn(metricas.TERMINADOS, archivos)
+
+
+class ReplicasTests(TestCase):
+    # En DB_MOTOR=sqlite 'replica1' es un espejo de 'default' (settings.py)
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        Usuario.objects.create_user('coordinador', password='clave-segura', rol='CO')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+
+    def setUp(self):
+        cache.clear()  # fijaciones a la primaria de otras pruebas
+        self.client = APIClient()
+        credenciales = base64.b64encode(b'coordinador:clave-segura').decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Basic {credenciales}')
+
+    def peticion(self, metodo, ruta, **kwargs):
+        # Devuelve (respuesta, SQL en la primaria, SQL en la réplica)
+        with CaptureQueriesContext(connections['default']) as primaria, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            respuesta = getattr(self.client, metodo)(ruta, **kwargs)
+        return respuesta, [q['sql'] for q in primaria], [q['sql'] for q in replica]
+
+    def test_lecturas_van_a_la_replica(self):
+        respuesta, primaria, replica = self.peticion('get', '/api/semestres/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()[0]['codigo'], '2025-1')
+        self.assertTrue(any('api_app_semestre' in sql for sql in replica))
+        self.assertFalse(any('api_app_semestre' in sql for sql in primaria))
+
+    def test_autenticacion_en_la_primaria(self):
+        _, primaria, replica = self.peticion('get', '/api/semestres/')
+        self.assertTrue(any('api_app_usuario' in sql for sql in primaria))
+        self.assertFalse(any('api_app_usuario' in sql for sql in replica))
+
+    def test_escrituras_van_a_la_primaria(self):
+        respuesta, primaria, replica = self.peticion(
+            'post', '/api/programa/', data={'nombre': 'Sistemas', 'codigo': 'SIS'}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertTrue(any(sql.startswith('INSERT INTO "api_app_programa"') for sql in primaria))
+        self.assertEqual(replica, [])
+        self.assertTrue(Programa.objects.filter(codigo='SIS').exists())
+
+    def test_fija_a_la_primaria_tras_escribir(self):
+        self.peticion('post', '/api/programa/', data={'nombre': 'Sistemas', 'codigo': 'SIS'}, format='json')
+        respuesta, primaria, replica = self.peticion('get', '/api/programa/')
+        self.assertEqual([p['codigo'] for p in respuesta.json()], ['SIS'])
+        self.assertTrue(any('api_app_programa' in sql for sql in primaria))
+        self.assertEqual(replica, [])
+
+    def test_horario_gestor_se_cachea_desde_la_primaria(self):
+        Usuario.objects.create_user('gestor', password='clave-segura', rol='GC')
+        credenciales = base64.b64encode(b'gestor:clave-segura').decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Basic {credenciales}')
+        respuesta, primaria, replica = self.peticion('get', '/api/horarios-gestor/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(any('api_app_horario' in sql for sql in primaria))
+        self.assertFalse(any('api_app_horario' in sql for sql in replica))
+
+
+class PlanesTests(TransactionTestCase):
+    # Las consultas frecuentes deben usar su índice (comando verificar_planes).
+    # TransactionTestCase: test_detecta_un_indice_borrado cambia de conexión.
+    def verificar(self):
+        call_command('verificar_planes', sembrar=300, stdout=StringIO())
+
+    def reconectar(self):
+        # Conexión nueva, como la de una ejecución real del comando: sin
+        # sentencias preparadas (sqlite3 las guarda por conexión) de antes del borrado
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # close() ignora las bases en memoria (se perderían): se abre otra
+            # conexión a la misma base compartida antes de soltar la anterior
+            anterior, connection.connection = connection.connection, None
+            connection.connect()
+            anterior.close()
+        else:
+            connection.close()
+
+    def test_consultas_frecuentes_usan_su_indice(self):
+        self.verificar()
+
+    def test_detecta_un_indice_borrado(self):
+        indice = next(i for i in Matricula._meta.indexes if i.name == 'matricula_sem_est_idx')
+        with connection.schema_editor() as editor:
+            editor.remove_index(Matricula, indice)
+        self.addCleanup(self.restaurar, indice)
+        self.reconectar()
+        with self.assertRaisesMessage(CommandError, 'no usa matricula_sem_est_idx'):
+            self.verificar()
+
+    def restaurar(self, indice):
+        with connection.schema_editor() as editor:
+            editor.add_index(Matricula, indice)
+
+
+class IdempotenciaTests(TestCase):
+    @override_settings(IDEMPOTENCIA_TTL=3600)
+    def test_purga_solo_las_claves_expiradas(self):
+        usuario = Usuario.objects.create_user('estudiante', rol='ES')
+        for clave in ('vieja', 'reciente'):
+            ClaveIdempotencia.objects.create(usuario=usuario, clave=clave, ruta='/api/matricula/', huella='-')
+        ClaveIdempotencia.objects.filter(clave='vieja').update(creada=timezone.now() - timedelta(hours=2))
+        call_command('purgar_idempotencia', lote=1, stdout=StringIO())
+        self.assertEqual(list(ClaveIdempotencia.objects.values_list('clave', flat=True)), ['reciente'])
+
+    @override_settings(ADMISION={'BACKEND': 'api_app.admision.MemoriaBackend', 'CONCURRENCIA': {'matricula': 1}})
+    def test_matricula_saturada_no_reserva_la_clave(self):
+        cliente = APIClient()
+        cliente.force_authenticate(Usuario.objects.create_user('estudiante', rol='ES'))
+        backend.cache_clear()
+        self.assertTrue(backend().entrar('matricula', 1))
+        respuesta = cliente.post('/api/matricula/', {}, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+        backend.cache_clear()
+
+
+class CatalogoTests(TestCase):
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(CATALOGO_SNAPSHOT_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def crear_programa(self, codigo):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            programa = Programa.objects.create(nombre=codigo, codigo=codigo)
+            # Solo se anota al confirmar la transacción
+            self.assertFalse(CambioCatalogo.objects.filter(objeto_id=programa.pk).exists())
+        self.assertEqual(len(callbacks), 1)
+        return programa
+
+    def test_conserva_el_snapshot_anterior(self):
+        self.crear_programa('P1')
+        _, primero = catalogo.generar_snapshot()
+        self.crear_programa('P2')
+        _, segundo = catalogo.generar_snapshot()
+        self.assertTrue(primero.exists())
+        self.crear_programa('P3')
+        _, tercero = catalogo.generar_snapshot()
+        self.assertFalse(primero.exists())
+        self.assertTrue(segundo.exists() and tercero.exists())
+
+    def test_compacta_lo_que_ya_esta_en_el_snapshot(self):
+        uno, dos = self.crear_programa('P1'), self.crear_programa('P2')
+        CambioCatalogo.objects.update(fecha=timezone.now() - timedelta(days=40))
+        version, _ = catalogo.generar_snapshot()
+        tres = self.crear_programa('P3')
+        self.assertEqual(catalogo.compactar_cambios(retencion_dias=30), 1)
+        # El cambio del snapshot y los posteriores se conservan
+        self.assertEqual(catalogo.version_minima(), version - 1)
+        self.assertEqual(
+            list(CambioCatalogo.objects.values_list('objeto_id', flat=True)), [dos.pk, tres.pk]
+        )
+        self.assertNotIn(uno.pk, [p['id'] for p in catalogo.cambios_desde(version)['insertados']['programas']])
+
+        usuario = Usuario.objects.create_user('estudiante', rol='ES')
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        self.assertEqual(cliente.get('/api/catalogo/changes/', {'since': 0}).status_code, 410)
+        respuesta = cliente.get('/api/catalogo/changes/', {'since': version})
+        self.assertEqual([p['id'] for p in respuesta.json()['insertados']['programas']], [tres.pk])
+
+    def test_borrado_de_una_fila_que_ya_estaba_en_el_snapshot(self):
+        # El alta se anota al confirmar: el snapshot puede leer la fila antes
+        with self.captureOnCommitCallbacks() as alta:
+            programa = Programa.objects.create(nombre='Nuevo', codigo='NUEVO')
+        programa_id = programa.pk
+        version, ruta = catalogo.generar_snapshot()
+        self.assertIn(b'NUEVO', gzip.decompress(ruta.read_bytes()))
+        for callback in alta:
+            callback()
+        with self.captureOnCommitCallbacks(execute=True):
+            programa.delete()
+
+        cliente = APIClient()
+        cliente.force_authenticate(Usuario.objects.create_user('estudiante', rol='ES'))
+        cambios = cliente.get('/api/catalogo/changes/', {'since': version}).json()
+        self.assertEqual(cambios['eliminados']['programas'], [programa_id])
+        self.assertEqual(cambios['insertados']['programas'], [])
+
+
+class HorarioEstudianteTests(TestCase):
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estudiante = Usuario.objects.create_user('estudiante', rol='ES')
+        gestor = Usuario.objects.create_user('gestor', rol='GC')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+        Semestre.objects.create(codigo='2025-2')
+        programa = Programa.objects.create(nombre='Sistemas', codigo='SIS')
+        ReglasPrograma.objects.create(programa=programa, max_clases_estudiante_dia=1)
+        salon = Salon.objects.create(codigo='A1', capacidad=30, edificio='A')
+        for i, hora in enumerate((7, 10)):
+            asignatura = Asignatura.objects.create(codigo=f'SIS{i}', nombre=f'Asignatura {i}', programa=programa, creditos=3)
+            Horario.objects.create(
+                asignatura=asignatura, salon=salon, gestor=gestor, dia='LUN',
+                hora_inicio=time(hora), hora_fin=time(hora + 2),
+            )
+            cls.matricula = Matricula.objects.create(estudiante=cls.estudiante, asignatura=asignatura, semestre_id='2025-1')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.estudiante)
+
+    def test_limite_diario_del_programa(self):
+        respuesta = self.client.get('/api/horarios-estudiante/por_dia/', {'dia': 'LUN'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['error'], "No puedes tener más de 1 asignaturas en un día")
+        resumen = self.client.get('/api/horarios-estudiante/semana/').json()['resumen']
+        self.assertTrue(resumen['LUN']['excede_limite'])
+        self.assertFalse(resumen['MAR']['excede_limite'])
+
+    def test_edicion_parcial_de_matricula(self):
+        respuesta = self.client.patch(f'/api/matricula/{self.matricula.pk}/', {'semestre': '2025-2'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.matricula.refresh_from_db()
+        self.assertEqual(self.matricula.semestre_id, '2025-2')
+
+
+class SemanaEstudianteTests(TestCase):
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estudiante = Usuario.objects.create_user('estudiante', rol='ES')
+        otro = Usuario.objects.create_user('otro', rol='ES')
+        gestor = Usuario.objects.create_user('gestor', rol='GC')
+        Semestre.objects.create(codigo='2024-2')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+        programa = Programa.objects.create(nombre='Sistemas', codigo='SIS')
+        salones = [Salon.objects.create(codigo=f'A{i}', capacidad=30, edificio='A') for i in range(2)]
+        clases = {
+            'SIS1': [('LUN', time(7), time(9)), ('MIE', time(7), time(9))],
+            'SIS2': [('LUN', time(10), time(12, 30))],
+            'SIS3': [('MAR', time(7), time(9))],  # matriculada el semestre anterior
+            'SIS4': [('JUE', time(7), time(9))],  # solo de otro estudiante
+        }
+        asignaturas = {}
+        for i, (codigo, bloques) in enumerate(clases.items()):
+            asignaturas[codigo] = Asignatura.objects.create(
+                codigo=codigo, nombre=f'Asignatura {codigo}', programa=programa, creditos=3
+            )
+            for dia, inicio, fin in bloques:
+                Horario.objects.create(
+                    asignatura=asignaturas[codigo], salon=salones[i % 2], gestor=gestor,
+                    dia=dia, hora_inicio=inicio, hora_fin=fin,
+                )
+        for codigo, semestre in (('SIS1', '2025-1'), ('SIS2', '2025-1'), ('SIS3', '2024-2')):
+            Matricula.objects.create(estudiante=cls.estudiante, asignatura=asignaturas[codigo], semestre_id=semestre)
+        Matricula.objects.create(estudiante=otro, asignatura=asignaturas['SIS4'], semestre_id='2025-1')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.estudiante)
+
+    def test_semana_agrupada_por_dia(self):
+        with CaptureQueriesContext(connections['default']) as primaria, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            respuesta = self.client.get('/api/horarios-estudiante/semana/')
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+
+        self.assertEqual(
+            {dia: [(c['asignatura_codigo'], c['hora_inicio']) for c in clases] for dia, clases in datos['dias'].items()},
+            {'LUN': [('SIS1', '07:00:00'), ('SIS2', '10:00:00')], 'MAR': [], 'MIE': [('SIS1', '07:00:00')],
+             'JUE': [], 'VIE': []},
+        )
+        lunes = datos['dias']['LUN'][1]
+        self.assertEqual(
+            (lunes['asignatura_nombre'], lunes['salon_codigo'], lunes['edificio']), ('Asignatura SIS2', 'A1', 'A')
+        )
+        self.assertEqual(datos['resumen']['LUN'], {'clases': 2, 'minutos': 270, 'excede_limite': False})
+        self.assertEqual(datos['resumen']['MAR'], {'clases': 0, 'minutos': 0, 'excede_limite': False})
+        self.assertEqual(datos['total_clases'], 3)
+        # Una sola consulta de horarios para toda la semana
+        consultas = [q['sql'] for q in [*primaria, *replica] if 'FROM "api_app_horario"' in q['sql']]
+        self.assertEqual(len(consultas), 1)
+
+
+class ImportarHorariosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = Usuario.objects.create_user('gestor', rol='GC')
+        programa = Programa.objects.create(nombre='Sistemas', codigo='SIS')
+        ReglasPrograma.objects.create(programa=programa, max_clases_gestor_dia=2)
+        cls.asignatura = Asignatura.objects.create(codigo='SIS1', nombre='Cálculo', programa=programa, creditos=3)
+        cls.salon = Salon.objects.create(codigo='A1', capacidad=30, edificio='A')
+        Horario.objects.create(
+            asignatura=cls.asignatura, salon=cls.salon, gestor=cls.gestor, dia='LUN',
+            hora_inicio=time(7), hora_fin=time(9),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.gestor)
+
+    def clase(self, dia, inicio):
+        return {
+            'asignatura': self.asignatura.pk, 'salon': self.salon.pk, 'gestor': self.gestor.pk,
+            'dia': dia, 'hora_inicio': f'{inicio:02}:00', 'hora_fin': f'{inicio + 2:02}:00',
+        }
+
+    def importar(self, clases, validar=False):
+        ruta = '/api/horarios/importar/' + ('?validar=1' if validar else '')
+        return self.client.post(ruta, clases, format='json')
+
+    def test_el_limite_cuenta_las_clases_anteriores_del_lote(self):
+        # Ya tiene 1 el lunes con máximo 2: entra la primera del lote, no la segunda
+        respuesta = self.importar([self.clase('LUN', 9), self.clase('LUN', 11), self.clase('MAR', 7)])
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(
+            respuesta.json()['errores'], {'1': ["Un gestor no puede tener más de 2 clases el mismo día"]}
+        )
+        # El lote es todo o nada
+        self.assertEqual(Horario.objects.count(), 1)
+
+    def test_validar_y_guardar(self):
+        lote = [self.clase('LUN', 9), self.clase('MAR', 7)]
+        respuesta = self.importar(lote, validar=True)
+        self.assertEqual(respuesta.json(), {'validos': 2})
+        self.assertEqual(Horario.objects.count(), 1)
+
+        respuesta = self.importar(lote)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(len(respuesta.json()), 2)
+        self.assertEqual(
+            dict(CargaGestorDia.objects.filter(gestor=self.gestor).values_list('dia', 'clases')), {'LUN': 2, 'MAR': 1}
+        )
+
+
+class SemestreTests(TestCase):
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estudiante = Usuario.objects.create_user('estudiante', rol='ES')
+        cls.otro = Usuario.objects.create_user('otro', rol='ES')
+        cls.gestor = Usuario.objects.create_user('gestor', rol='GC')
+        Semestre.objects.create(codigo='2024-2')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+        programa = Programa.objects.create(nombre='Sistemas', codigo='SIS')
+        cls.asignatura = Asignatura.objects.create(codigo='SIS1', nombre='Cálculo', programa=programa, creditos=3)
+        cls.anterior = Matricula.objects.create(estudiante=cls.estudiante, asignatura=cls.asignatura, semestre_id='2024-2')
+        Matricula.objects.create(estudiante=cls.otro, asignatura=cls.asignatura, semestre_id='2025-1')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.estudiante)
+
+    def matricular(self):
+        return self.client.post(
+            '/api/matricula/', {'estudiante': self.estudiante.pk, 'asignatura': self.asignatura.pk}, format='json'
+        )
+
+    def propias(self):
+        # El listado muestra las matrículas vigentes; solo interesan las del estudiante
+        return [m['semestre'] for m in self.client.get('/api/matricula/').json() if m['estudiante'] == self.estudiante.pk]
+
+    def test_vigentes_solo_del_semestre_actual(self):
+        self.assertEqual(list(Matricula.objects.vigentes().values_list('estudiante_id', flat=True)), [self.otro.pk])
+        self.assertEqual(self.propias(), [])
+
+    def test_repetir_una_asignatura_de_otro_semestre(self):
+        respuesta = self.matricular()
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json()['semestre'], '2025-1')
+        # En el mismo semestre sí es un duplicado
+        self.assertEqual(self.matricular().status_code, 400)
+        self.assertEqual(self.propias(), ['2025-1'])
+
+    def test_archivar_semestre(self):
+        call_command('archivar_semestres', '2024-2', stdout=StringIO())
+        self.assertFalse(Matricula.objects.filter(pk=self.anterior.pk).exists())
+        historica = MatriculaHistorica.objects.get(matricula_id=self.anterior.pk)
+        self.assertEqual((historica.estudiante_id, historica.semestre_id), (self.estudiante.pk, '2024-2'))
+        self.assertTrue(Semestre.objects.get(codigo='2024-2').cerrado)
+        with self.assertRaisesMessage(CommandError, 'semestre actual'):
+            call_command('archivar_semestres', '2025-1', stdout=StringIO())
+        # El estudiante ve su histórico
+        filas = self.client.get('/api/matriculas-historicas/').json()
+        self.assertEqual([f['matricula_id'] for f in filas], [self.anterior.pk])
+
+    def test_notificacion_masiva_solo_a_matriculados_vigentes(self):
+        self.client.force_authenticate(self.gestor)
+        respuesta = self.client.post('/api/notificaciones/enviar_masiva/', {
+            'asignatura': self.asignatura.pk, 'titulo': 'Aviso', 'mensaje': 'Sin clase',
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(list(NotificacionUsuario.objects.values_list('usuario_id', flat=True)), [self.otro.pk])
+
+
+class NotificacionesHorarioTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = Usuario.objects.create_user('gestor', rol='GC')
+        cls.coordinador = Usuario.objects.create_user('coordinador', rol='CO')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+        cls.programa = Programa.objects.create(nombre='Sistemas', codigo='SIS', coordinador=cls.coordinador)
+        cls.calculo = Asignatura.objects.create(codigo='SIS1', nombre='Cálculo', programa=cls.programa, creditos=3)
+        cls.fisica = Asignatura.objects.create(codigo='SIS2', nombre='Física', programa=cls.programa, creditos=3)
+        salon = Salon.objects.create(codigo='A-101', capacidad=30, edificio='A')
+        cls.horarios = [
+            Horario.objects.create(
+                asignatura=asignatura, salon=salon, gestor=cls.gestor, dia=dia,
+                hora_inicio=time(7), hora_fin=time(9),
+            )
+            for asignatura, dia in ((cls.calculo, 'LUN'), (cls.calculo, 'MIE'), (cls.fisica, 'MAR'))
+        ]
+        cls.estudiantes = {}
+        for nombre, asignaturas in (('solo_calculo', [cls.calculo]), ('ambas', [cls.calculo, cls.fisica]),
+                                    ('solo_fisica', [cls.fisica])):
+            estudiante = Usuario.objects.create_user(nombre, rol='ES')
+            for asignatura in asignaturas:
+                Matricula.objects.create(estudiante=estudiante, asignatura=asignatura, semestre_id='2025-1')
+            cls.estudiantes[nombre] = estudiante
+
+    def setUp(self):
+        # Las altas del fixture también quedaron registradas como cambios
+        CambioHorario.objects.all().delete()
+
+    def editar(self, horario, hora):
+        horario.hora_inicio, horario.hora_fin = time(hora), time(hora + 2)
+        horario.save()
+
+    def test_agrupa_varias_ediciones_en_una_notificacion_por_estudiante(self):
+        lunes, miercoles, martes = self.horarios
+        self.editar(lunes, 9)
+        self.editar(lunes, 11)
+        self.editar(miercoles, 14)
+        self.editar(martes, 9)
+        self.assertEqual(CambioHorario.objects.count(), 3)
+
+        # La ráfaga sigue dentro de la ventana
+        self.assertEqual(entregar_cambios_horario(), (0, 0))
+        self.assertEqual(entregar_cambios_horario(forzar=True), (3, 3))
+
+        self.assertFalse(CambioHorario.objects.exists())
+        for estudiante in self.estudiantes.values():
+            self.assertEqual(NotificacionUsuario.objects.filter(usuario=estudiante).count(), 1)
+        mensaje = NotificacionUsuario.objects.get(usuario=self.estudiantes['ambas']).notificacion.mensaje
+        self.assertEqual(mensaje.splitlines(), [
+            "- Cálculo: ahora Lunes 11:00-13:00, salón A-101.",
+            "- Física: ahora Martes 09:00-11:00, salón A-101.",
+            "- Cálculo: ahora Miércoles 14:00-16:00, salón A-101.",
+        ])
+
+    @override_settings(NOTIFICACION_HORARIO_LOTE=1)
+    def test_entrega_por_lotes(self):
+        for horario in self.horarios:
+            self.editar(horario, 9)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(entregar_cambios_horario(forzar=True), (3, 3))
+        inserciones = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('INSERT INTO "api_app_notificacionusuario"')
+        ]
+        self.assertEqual(len(inserciones), 3)
+
+    def test_sin_emisor_no_se_pierde_el_aviso(self):
+        lunes = self.horarios[0]
+        self.editar(lunes, 9)
+        # El autor del cambio fue borrado (CambioHorario.emisor es SET_NULL)
+        CambioHorario.objects.update(emisor=None)
+        self.assertEqual(entregar_cambios_horario(forzar=True), (1, 2))
+        self.assertEqual(Notificacion.objects.get().emisor, self.coordinador)
+
+        Programa.objects.filter(pk=self.programa.pk).update(coordinador=None)
+        self.editar(lunes, 11)
+        CambioHorario.objects.update(emisor=None)
+        self.assertEqual(entregar_cambios_horario(forzar=True), (1, 2))
+        self.assertIsNone(Notificacion.objects.latest('pk').emisor)
+        self.assertEqual(NotificacionUsuario.objects.filter(usuario=self.estudiantes['solo_calculo']).count(), 2)
+
+
+class CargasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = Usuario.objects.create_user('gestor', rol='GC')
+        cls.estudiante = Usuario.objects.create_user('estudiante', rol='ES')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+        programa = Programa.objects.create(nombre='Sistemas', codigo='SIS')
+        cls.asignatura = Asignatura.objects.create(codigo='SIS1', nombre='Cálculo', programa=programa, creditos=3)
+        cls.salon = Salon.objects.create(codigo='A1', capacidad=30, edificio='A')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.gestor)
+
+    def crear(self, hora, dia='LUN'):
+        return Horario.objects.create(
+            asignatura=self.asignatura, salon=self.salon, gestor=self.gestor, dia=dia,
+            hora_inicio=time(hora), hora_fin=time(hora + 2),
+        )
+
+    def clases(self, dia):
+        return CargaGestorDia.objects.filter(gestor=self.gestor, dia=dia).values_list('clases', flat=True).first()
+
+    def test_limite_en_el_borde(self):
+        # MAX_CLASES_GESTOR_DIA = 4: la cuarta entra, la quinta no
+        for hora in (7, 9, 11, 14):
+            self.crear(hora)
+        self.assertEqual(self.clases('LUN'), 4)
+        with self.assertRaises(LimiteExcedido):
+            self.crear(16)
+        self.assertEqual(Horario.objects.count(), 4)
+        self.assertEqual(self.clases('LUN'), 4)
+
+    def test_cambiar_de_dia_mueve_el_cupo(self):
+        horario = self.crear(7)
+        respuesta = self.client.patch(f'/api/horarios/{horario.pk}/', {'dia': 'MAR'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((self.clases('LUN'), self.clases('MAR')), (0, 1))
+
+    def test_borrar_libera_el_cupo(self):
+        horarios = [self.crear(hora) for hora in (7, 9, 11, 14)]
+        respuesta = self.client.delete(f'/api/horarios/{horarios[0].pk}/')
+        self.assertEqual(respuesta.status_code, 204)
+        self.assertEqual(self.clases('LUN'), 3)
+        self.crear(16)
+        self.assertEqual(self.clases('LUN'), 4)
+
+    def test_reconciliar_repara_la_deriva(self):
+        self.crear(7)
+        self.crear(9, dia='MAR')
+        Matricula.objects.create(estudiante=self.estudiante, asignatura=self.asignatura, semestre_id='2025-1')
+        # Contadores desviados: un fallo a medias, una edición directa en la base...
+        CargaGestorDia.objects.filter(dia='LUN').update(clases=4)
+        CargaGestorDia.objects.filter(dia='MAR').delete()
+        CargaGestorDia.objects.create(gestor=self.gestor, dia='VIE', clases=2)
+        CargaEstudiante.objects.update(asignaturas=8)
+
+        self.assertEqual(reconciliar_cargas(), (2, 1))
+        self.assertEqual(
+            dict(CargaGestorDia.objects.values_list('dia', 'clases')), {'LUN': 1, 'MAR': 1}
+        )
+        self.assertEqual(CargaEstudiante.objects.get(estudiante=self.estudiante).asignaturas, 1)
+
+
+class _Evaluado(list):
+    # Resultado ya evaluado que acepta .using() como un queryset
+    def using(self, alias):
+        return self
+
+
+class GestoresTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = Usuario.objects.create_user('gestor', rol='GC')
+        cls.estudiante = Usuario.objects.create_user('estudiante', rol='ES')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+        programa = Programa.objects.create(nombre='Sistemas', codigo='SIS')
+        cls.asignatura = Asignatura.objects.create(codigo='SIS1', nombre='Cálculo', programa=programa, creditos=3)
+        Horario.objects.create(
+            asignatura=cls.asignatura, salon=Salon.objects.create(codigo='A1', capacidad=30, edificio='A'),
+            gestor=cls.gestor, dia='LUN', hora_inicio=time(7), hora_fin=time(9),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def matriculados(self):
+        return gestores.horario_gestor(self.gestor.pk, lambda horarios: sum(h.matriculados for h in horarios))
+
+    def matricular(self):
+        Matricula.objects.create(estudiante=self.estudiante, asignatura=self.asignatura, semestre_id='2025-1')
+
+    def test_la_version_sube_al_confirmar(self):
+        self.assertEqual(self.matriculados(), 0)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.matricular()
+            # Sin confirmar, el caché sigue valiendo
+            self.assertEqual(self.matriculados(), 0)
+        self.assertTrue(callbacks)
+        self.assertEqual(self.matriculados(), 1)
+
+    def test_matricula_confirmada_durante_la_construccion(self):
+        # La matrícula confirma justo después de la consulta de conteos: la
+        # entrada guarda la versión previa y la siguiente lectura la reconstruye
+        consulta = gestores.horarios_con_matriculados
+
+        def consulta_con_matricula(gestor_id):
+            horarios = _Evaluado(consulta(gestor_id))
+            self.matricular()
+            gestores.asignatura_modificada(self.asignatura.pk)
+            return horarios
+
+        with mock.patch.object(gestores, 'horarios_con_matriculados', consulta_con_matricula):
+            self.assertEqual(self.matriculados(), 0)
+        self.assertEqual(self.matriculados(), 1)
+
+
+class ResumenesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.coordinador = Usuario.objects.create_user('coordinador', rol='CO')
+        cls.estudiante = Usuario.objects.create_user('estudiante', rol='ES')
+        gestor = Usuario.objects.create_user('gestor', rol='GC')
+        Semestre.objects.create(codigo='2025-1', actual=True)
+        cls.sistemas = Programa.objects.create(nombre='Sistemas', codigo='SIS', coordinador=cls.coordinador)
+        cls.industrial = Programa.objects.create(nombre='Industrial', codigo='IND')
+        cls.calculo = Asignatura.objects.create(codigo='SIS1', nombre='Cálculo', programa=cls.sistemas, creditos=3)
+        cls.procesos = Asignatura.objects.create(codigo='IND1', nombre='Procesos', programa=cls.industrial, creditos=4)
+        cls.horario = Horario.objects.create(
+            asignatura=cls.calculo, salon=Salon.objects.create(codigo='A1', capacidad=30, edificio='A'),
+            gestor=gestor, dia='LUN', hora_inicio=time(7), hora_fin=time(9),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def pendientes(self):
+        return set(ResumenPrograma.objects.filter(pendiente=True).values_list('programa_id', flat=True))
+
+    def matriculados(self, tablero):
+        return {f['codigo']: f['matriculados'] for f in tablero['matricula_por_asignatura']}
+
+    def test_lectura_marca_y_refresco(self):
+        tablero = resumenes.leer(self.sistemas.pk)
+        self.assertFalse(tablero['pendiente'])
+        self.assertIsNotNone(tablero['actualizado'])
+        self.assertEqual(self.matriculados(tablero), {'SIS1': 0})
+
+        Matricula.objects.create(estudiante=self.estudiante, asignatura=self.calculo, semestre_id='2025-1')
+        self.assertEqual(self.pendientes(), {self.sistemas.pk})
+        # Sigue sirviendo lo calculado, pero avisa que está atrasado
+        tablero = resumenes.leer(self.sistemas.pk)
+        self.assertTrue(tablero['pendiente'])
+        self.assertEqual(self.matriculados(tablero), {'SIS1': 0})
+
+        call_command('refrescar_resumenes', stdout=StringIO())
+        self.assertEqual(self.pendientes(), set())
+        nuevo = resumenes.leer(self.sistemas.pk)
+        self.assertFalse(nuevo['pendiente'])
+        self.assertGreater(nuevo['actualizado'], tablero['actualizado'])
+        self.assertEqual(self.matriculados(nuevo), {'SIS1': 1})
+
+    def test_mover_un_horario_marca_ambos_programas(self):
+        for programa in (self.sistemas, self.industrial):
+            resumenes.leer(programa.pk)
+        self.horario.asignatura = self.procesos
+        self.horario.save()
+        self.assertEqual(self.pendientes(), {self.sistemas.pk, self.industrial.pk})
+
+    def test_mover_una_asignatura_marca_ambos_programas(self):
+        for programa in (self.sistemas, self.industrial):
+            resumenes.leer(programa.pk)
+        self.procesos.programa = self.sistemas
+        self.procesos.save()
+        self.assertEqual(self.pendientes(), {self.sistemas.pk, self.industrial.pk})
+
+    def test_analitica_del_coordinador(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.coordinador)
+        respuesta = cliente.get(f'/api/analitica/{self.sistemas.pk}/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['pendiente'], False)
+        self.assertEqual(cliente.get(f'/api/analitica/{self.industrial.pk}/').status_code, 403)
+
+
+class ConflictosTests(TestCase):
+    # revisar_estudiante (bitsets y conteos empaquetados) contra una revisión
+    # directa por pares de clases
+    @classmethod
+    def setUpTestData(cls):
+        programa = Programa.objects.create(nombre='Sistemas', codigo='SIS')
+        salon = Salon.objects.create(codigo='A1', capacidad=30, edificio='A')
+        rng = random.Random(7)
+        # Bloques que se tocan (7-9 y 9-11) y que se solapan (8-10)
+        bloques = [(7, 0, 9, 0), (9, 0, 11, 0), (8, 0, 10, 0), (11, 0, 12, 30), (12, 30, 14, 0), (14, 0, 16, 0)]
+        cls.clases = {}
+        for i in range(15):
+            asignatura = Asignatura.objects.create(codigo=f'SIS{i}', nombre=f'Asignatura {i}', programa=programa, creditos=3)
+            gestor = Usuario.objects.create_user(f'gestor{i}', rol='GC')
+            cls.clases[asignatura.pk] = []
+            for dia in rng.sample(conflictos.DIAS, rng.randint(1, 3)):
+                h1, m1, h2, m2 = rng.choice(bloques)
+                Horario.objects.create(
+                    asignatura=asignatura, salon=salon, gestor=gestor, dia=dia,
+                    hora_inicio=time(h1, m1), hora_fin=time(h2, m2),
+                )
+                cls.clases[asignatura.pk].append((dia, h1 * 60 + m1, h2 * 60 + m2))
+
+    def ingenuo(self, asignaturas, max_dia, max_total):
+        encontrados = []
+        for dia in conflictos.DIAS:
+            for i, a in enumerate(asignaturas):
+                for b in asignaturas[i + 1:]:
+                    if any(
+                        dia_a == dia_b == dia and inicio_a < fin_b and inicio_b < fin_a
+                        for dia_a, inicio_a, fin_a in self.clases[a]
+                        for dia_b, inicio_b, fin_b in self.clases[b]
+                    ):
+                        encontrados.append(('CHO', dia, [a, b]))
+            del_dia = [a for a in asignaturas for d, _, _ in self.clases[a] if d == dia]
+            if len(del_dia) > max_dia:
+                encontrados.append(('DIA', dia, sorted(set(del_dia))))
+        if len(asignaturas) > max_total:
+            encontrados.append(('TOT', '', list(asignaturas)))
+        return sorted(encontrados)
+
+    def revisar(self, asignaturas, indice, max_dia=2, max_total=5):
+        return sorted(
+            (tipo, dia, sorted(implicadas) if tipo == 'DIA' else implicadas)
+            for tipo, dia, implicadas in conflictos.revisar_estudiante(asignaturas, indice, max_dia, max_total)
+        )
+
+    def test_coincide_con_la_revision_por_pares(self):
+        indice = conflictos.indice_asignaturas()
+        rng = random.Random(11)
+        ids = sorted(self.clases)
+        for _ in range(300):
+            asignaturas = sorted(rng.sample(ids, rng.randint(1, 7)))
+            self.assertEqual(self.revisar(asignaturas, indice), self.ingenuo(asignaturas, 2, 5), asignaturas)
+
+    def test_clases_contiguas_no_chocan(self):
+        a, b, c = Asignatura.objects.filter(codigo__in=['SIS0', 'SIS1', 'SIS2']).order_by('codigo')
+        Horario.objects.filter(asignatura__in=[a, b, c]).delete()
+        gestor = Usuario.objects.get(username='gestor0')
+        salon = Salon.objects.get()
+        for asignatura, inicio, fin in ((a, 7, 9), (b, 9, 11), (c, 10, 12)):
+            Horario.objects.create(
+                asignatura=asignatura, salon=salon, gestor=gestor, dia='LUN',
+                hora_inicio=time(inicio), hora_fin=time(fin),
+            )
+        indice = conflictos.indice_asignaturas()
+        # 07:00-09:00 y 09:00-11:00 no se solapan; 09:00-11:00 y 10:00-12:00 sí
+        self.assertEqual(self.revisar([a.pk, b.pk], indice), [])
+        self.assertEqual(self.revisar([a.pk, b.pk, c.pk], indice, max_dia=3), [('CHO', 'LUN', [b.pk, c.pk])])
+        # Límite diario: 3 clases el lunes con máximo 2
+        self.assertEqual(
+            self.revisar([a.pk, b.pk, c.pk], indice),
+            [('CHO', 'LUN', [b.pk, c.pk]), ('DIA', 'LUN', [a.pk, b.pk, c.pk])],
+        )
+        self.assertEqual(self.revisar([a.pk, b.pk], indice, max_dia=1), [('DIA', 'LUN', [a.pk, b.pk])])
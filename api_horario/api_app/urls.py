@@ -1,11 +1,10 @@
 # api_horario/api_horario/api_app/urls.py
 
 from django.urls import path, include
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from .admision import LoginThrottle
 from .views import (
     # Importa todos los ViewSets que has definido en api_app/views.py
     UsuarioViewSet,
@@ -18,6 +17,12 @@ from .views import (
     ConfiguracionUsuarioViewSet,
     EstudianteHorarioViewSet, # Asumiendo que esta vista existe
     BuscadorViewSet,          # Asumiendo que esta vista existe
+    SemestreViewSet,
+    MatriculaHistoricaViewSet,
+    CatalogoViewSet,
+    AnaliticaProgramaViewSet,
+    GestorHorarioViewSet,
+    ReporteConflictosViewSet,
 )
 
 # Crea una instancia del DefaultRouter de Django REST Framework
@@ -35,6 +40,27 @@ router.register(r'horarios', HorarioViewSet, basename='horario')
 router.register(r'notificaciones', NotificacionViewSet, basename='notificacion')
 router.register(r'configuracion', ConfiguracionUsuarioViewSet, basename='configuracion')
 router.register(r'horarios-estudiante', EstudianteHorarioViewSet, basename='estudiante-horario')
+router.register(r'semestres', SemestreViewSet, basename='semestre')
+router.register(r'matriculas-historicas', MatriculaHistoricaViewSet, basename='matricula-historica')
+router.register(r'catalogo', CatalogoViewSet, basename='catalogo')
+router.register(r'analitica', AnaliticaProgramaViewSet, basename='analitica')
+router.register(r'horarios-gestor', GestorHorarioViewSet, basename='gestor-horario')
+router.register(r'reportes-conflictos', ReporteConflictosViewSet, basename='reporte-conflictos')
+
+
+def vista_diferida(ruta, **initkwargs):
+    # Importa la vista en su primera petición. simplejwt carga django.test al
+    # importar su configuración (~30 ms por worker) y solo lo usa /api/token/.
+    vista = None
+
+    @csrf_exempt
+    def despachar(request, *args, **kwargs):
+        nonlocal vista
+        if vista is None:
+            vista = import_string(ruta).as_view(**initkwargs)
+        return vista(request, *args, **kwargs)
+
+    return despachar
 
 
 # Define la lista de patrones de URL para esta aplicación.
@@ -46,8 +72,13 @@ urlpatterns = [
 
     # Rutas para la autenticación JWT (generación y refresco de tokens)
     # Estas rutas serán: /api/token/ y /api/token/refresh/
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    # Con sus propios límites: el bucket anónimo por IP bloquearía el login de todo el campus
+    path('token/', vista_diferida(
+        'rest_framework_simplejwt.views.TokenObtainPairView', throttle_classes=[LoginThrottle],
+    ), name='token_obtain_pair'),
+    path('token/refresh/', vista_diferida(
+        'rest_framework_simplejwt.views.TokenRefreshView', throttle_classes=[LoginThrottle],
+    ), name='token_refresh'),
 
     # Rutas para acciones personalizadas o ViewSets que no usan el router directamente.
     # Estas se definen explícitamente usando path().
@@ -1,17 +1,32 @@
 # api_app/views.py
 
 from rest_framework import viewsets, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import AllowAny
-from django.db.models import Count, Q
-from django.utils import timezone
-from datetime import time
-from .models import *
-from .serializers import *
-from .permissions import *
-from .models import Usuario, Programa # Asegúrate de importar Programa
-from .serializers import UsuarioSerializer, ProgramaSerializer # Asegúrate de importar ProgramaSerializer
+from rest_framework.pagination import LimitOffsetPagination
+from django.db import transaction
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from .models import (
+    Asignatura, ConfiguracionUsuario, Horario, Matricula, MatriculaHistorica,
+    Notificacion, NotificacionUsuario, Programa, ReglasPrograma, ReporteConflictos, Salon,
+    Semestre, Usuario,
+)
+from .serializers import (
+    AsignaturaSerializer, ConfiguracionUsuarioSerializer, HorarioGestorSerializer,
+    HorarioSemanaSerializer, HorarioSerializer, MatriculaHistoricaSerializer,
+    MatriculaSerializer, NotificacionSerializer, ProgramaSerializer, SalonSerializer,
+    SemestreSerializer, UsuarioSerializer, ReporteConflictosSerializer,
+    ConflictoMatriculaSerializer, ReglasProgramaSerializer,
+)
+from .notificaciones import agrupar_cambios_horario
+from .replicas import LecturaReplicaMixin
+from .admision import ConcurrenciaMixin
+from .idempotencia import IdempotenciaMixin
+# Sin importación diferida: signals.py (AppConfig.ready) ya los carga al arrancar
+from . import catalogo, gestores, reglas, resumenes
 
 class UsuarioViewSet(viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
@@ -26,12 +41,35 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         return queryset
 
 # AÑADIR ESTO: Definición de ProgramaViewSet
-class ProgramaViewSet(viewsets.ModelViewSet):
+class ProgramaViewSet(LecturaReplicaMixin, viewsets.ModelViewSet):
     queryset = Programa.objects.all()
     serializer_class = ProgramaSerializer
     # Puedes añadir permisos aquí si es necesario, por ejemplo:
     # permission_classes = [permissions.IsAuthenticated, IsCoordinador]
 
+    @action(detail=True, methods=['get', 'put', 'patch'], url_path='reglas')
+    def reglas_horario(self, request, pk=None):
+        # Reglas de horario del programa: las propias y las efectivas (con las
+        # heredadas de settings.REGLAS_HORARIO). Solo su coordinador las edita.
+        programa = self.get_object()
+        propias = ReglasPrograma.objects.filter(programa=programa).first()
+        if request.method != 'GET':
+            es_coordinador = request.user.is_authenticated and request.user.pk == programa.coordinador_id
+            if not es_coordinador and not request.user.is_superuser:
+                return Response(
+                    {"error": "Solo el coordinador del programa puede cambiar sus reglas"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            serializer = ReglasProgramaSerializer(
+                propias, data=request.data, partial=request.method == 'PATCH'
+            )
+            serializer.is_valid(raise_exception=True)
+            propias = serializer.save(programa=programa)
+        return Response({
+            "propias": ReglasProgramaSerializer(propias).data if propias else None,
+            "efectivas": reglas.presentar(reglas.parametros(programa.pk)),
+        })
+
 
 # === Permisos Personalizados (permissions.py) ===
 class IsCoordinador(permissions.BasePermission):
@@ -47,82 +85,80 @@ class IsEstudiante(permissions.BasePermission):
         return request.user.rol == 'ES'
 
 # === Views Personalizadas ===
-class HorarioViewSet(viewsets.ModelViewSet):
+class HorarioViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     queryset = Horario.objects.all()
     serializer_class = HorarioSerializer
     permission_classes = [permissions.IsAuthenticated, IsCoordinador | IsGestor]
 
-    def create(self, request, *args, **kwargs):
-        # Validación: Clases entre 2 y 3 horas
-        hora_inicio = request.data.get('hora_inicio')
-        hora_fin = request.data.get('hora_fin')
-        
-        # Necesitarás convertir a objetos datetime para restar correctamente
-        # O manejar las horas como cadenas ISO 8601 y luego calcular la diferencia
-        # Esta lógica de diferencia de tiempo puede ser más compleja con solo 'time'
-        # Podrías necesitar un parser como:
-        # from datetime import datetime
-        # start_dt = datetime.combine(datetime.min.date(), time.fromisoformat(hora_inicio))
-        # end_dt = datetime.combine(datetime.min.date(), time.fromisoformat(hora_fin))
-        # duration_seconds = (end_dt - start_dt).total_seconds()
-        # if not (2*3600 <= duration_seconds <= 3*3600):
-        # ...
-        
-        # Simplificando la validación del tiempo para que compile, pero la lógica de la duración debería ser revisada
-        # dado que 'time' objects don't directly support subtraction for timedelta.
-        # Asumiendo que hora_inicio y hora_fin son strings en formato HH:MM:SS
-        try:
-            h_inicio = time.fromisoformat(hora_inicio)
-            h_fin = time.fromisoformat(hora_fin)
-            
-            # Convierte a minutos para una comparación más sencilla
-            minutos_inicio = h_inicio.hour * 60 + h_inicio.minute
-            minutos_fin = h_fin.hour * 60 + h_fin.minute
-            
-            duracion_minutos = minutos_fin - minutos_inicio
-            
-            if not (120 <= duracion_minutos <= 180): # 2 horas = 120 minutos, 3 horas = 180 minutos
-                return Response(
-                    {"error": "Las clases deben durar entre 2 y 3 horas"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        except ValueError:
+    # Duración, franja, días y clases por gestor/día: reglas del programa,
+    # aplicadas en HorarioSerializer.validate (api_app/reglas.py)
+
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        # Lista de clases validada como un solo lote: las reglas ven también las
+        # clases anteriores del mismo lote. Con ?validar=1 no se guarda nada.
+        if not isinstance(request.data, list):
             return Response(
-                {"error": "Formato de hora inválido. Use HH:MM:SS"},
+                {"error": "Se espera una lista de horarios"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-
-        # Validación: Gestor no puede tener más de 4 clases/día
-        gestor_id = request.data.get('gestor')
-        dia = request.data.get('dia')
-        
-        if Horario.objects.filter(gestor_id=gestor_id, dia=dia).count() >= 4:
+        serializer = self.get_serializer(
+            data=request.data, many=True, context={**self.get_serializer_context(), 'reglas_en_lote': True}
+        )
+        serializer.is_valid(raise_exception=True)
+        errores = reglas.validar_clases(
+            reglas.clase_desde_datos(datos, clave=i) for i, datos in enumerate(serializer.validated_data)
+        )
+        if errores:
             return Response(
-                {"error": "Un gestor no puede tener más de 4 clases el mismo día"},
+                {"errores": {str(i): mensajes for i, mensajes in sorted(errores.items())}},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        return super().create(request, *args, **kwargs)
-
-class MatriculaViewSet(viewsets.ModelViewSet):
+        if request.query_params.get('validar') in ('1', 'true'):
+            return Response({"validos": len(serializer.validated_data)})
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    # Los cambios se registran como pendientes y se notifican a los estudiantes
+    # matriculados (ver api_app/notificaciones.py)
+    def perform_update(self, serializer):
+        with transaction.atomic(), agrupar_cambios_horario(emisor=self.request.user):
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(), agrupar_cambios_horario(emisor=self.request.user):
+            super().perform_destroy(instance)
+
+# ConcurrenciaMixin primero en el MRO: admite o rechaza antes que los demás mixins
+class MatriculaViewSet(ConcurrenciaMixin, IdempotenciaMixin, viewsets.ModelViewSet):
     queryset = Matricula.objects.all()
     serializer_class = MatriculaSerializer
     permission_classes = [permissions.IsAuthenticated, IsEstudiante]
+    clase_admision = 'matricula'
+
+    def get_queryset(self):
+        # Por defecto solo el semestre actual; ?semestre=2025-1 para otro abierto
+        queryset = super().get_queryset()
+        semestre = self.request.query_params.get('semestre')
+        if semestre:
+            return queryset.del_semestre(semestre)
+        return queryset.vigentes()
 
     def create(self, request, *args, **kwargs):
         estudiante = request.user
         asignatura_id = request.data.get('asignatura')
         
         # Validación: Máximo 8 asignaturas
-        if Matricula.objects.filter(estudiante=estudiante).count() >= 8:
-            return Response(
-                {"error": "No puedes matricularte en más de 8 asignaturas"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Validación: No repetir asignaturas
-        if Matricula.objects.filter(estudiante=estudiante, asignatura_id=asignatura_id).exists():
+        # La hace el contador CargaEstudiante al guardar (api_app/cargas.py)
+
+        # Validación: No repetir asignaturas en el semestre (por defecto el actual)
+        semestre = request.data.get('semestre') or Semestre.codigo_actual()
+        if Matricula.objects.del_semestre(semestre).filter(estudiante=estudiante, asignatura_id=asignatura_id).exists():
             return Response(
                 {"error": "Ya estás matriculado en esta asignatura"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -130,7 +166,15 @@ class MatriculaViewSet(viewsets.ModelViewSet):
         
         return super().create(request, *args, **kwargs)
 
-class NotificacionViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+class NotificacionViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     queryset = Notificacion.objects.all()
     serializer_class = NotificacionSerializer
     permission_classes = [permissions.IsAuthenticated, IsCoordinador | IsGestor]
@@ -145,7 +189,7 @@ class NotificacionViewSet(viewsets.ModelViewSet):
             )
         
         asignatura_id = request.data.get('asignatura')
-        estudiantes = Matricula.objects.filter(asignatura_id=asignatura_id).values_list('estudiante', flat=True)
+        estudiantes = Matricula.objects.vigentes().filter(asignatura_id=asignatura_id).values_list('estudiante', flat=True)
         
         notificacion = Notificacion.objects.create(
             titulo=request.data.get('titulo'),
@@ -164,34 +208,263 @@ class NotificacionViewSet(viewsets.ModelViewSet):
         return Response({"status": "Notificación enviada"}, status=status.HTTP_201_CREATED)
 
 # === Views para Estudiantes ===
-class EstudianteHorarioViewSet(viewsets.ReadOnlyModelViewSet):
+class EstudianteHorarioViewSet(ConcurrenciaMixin, LecturaReplicaMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = HorarioSerializer
     permission_classes = [permissions.IsAuthenticated, IsEstudiante]
+    clase_admision = 'horario_estudiante'
 
     def get_queryset(self):
         # Horario del estudiante (matrículas)
-        asignaturas = Matricula.objects.filter(estudiante=self.request.user).values_list('asignatura', flat=True)
+        asignaturas = Matricula.objects.vigentes().filter(estudiante=self.request.user).values_list('asignatura', flat=True)
         return Horario.objects.filter(asignatura_id__in=asignaturas)
 
     @action(detail=False, methods=['get'])
     def por_dia(self, request):
         dia = request.query_params.get('dia')
-        horarios = self.get_queryset().filter(dia=dia)
-        
-        # Validación: Máximo 4 asignaturas/día
+        horarios = list(self.get_queryset().filter(dia=dia).select_related('asignatura'))
+        limite = reglas.limite_mas_permisivo(
+            {h.asignatura.programa_id for h in horarios}, 'MAX_CLASES_ESTUDIANTE_DIA'
+        )
+
+        # Validación: Máximo MAX_CLASES_ESTUDIANTE_DIA asignaturas/día (reglas del programa)
         # Esta validación aquí puede ser engañosa, ya que se aplica *después* de filtrar por día
         # Si un estudiante matriculó 5 asignaturas pero solo 3 son para el día 'dia',
         # esta validación dirá que está bien. Si quieres validar el total de matriculas,
         # debe hacerse en MatriculaViewSet.create
-        if horarios.count() > 4:
+        if len(horarios) > limite:
             return Response(
-                {"error": "No puedes tener más de 4 asignaturas en un día"},
+                {"error": f"No puedes tener más de {limite} asignaturas en un día"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         serializer = self.get_serializer(horarios, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def semana(self, request):
+        # Semana completa en una sola consulta: JOIN con matrícula, asignatura y salón
+        # (reemplaza las 5 llamadas a por_dia y sus count())
+        filtro = Q(asignatura__matricula__estudiante=request.user)
+        codigo = Semestre.codigo_actual()
+        if codigo:
+            filtro &= Q(asignatura__matricula__semestre_id=codigo)
+        horarios = list(Horario.objects.filter(filtro).select_related('asignatura', 'salon'))
+        limite = reglas.limite_mas_permisivo(
+            {h.asignatura.programa_id for h in horarios}, 'MAX_CLASES_ESTUDIANTE_DIA'
+        )
+
+        dias = {codigo: [] for codigo, _ in Horario.DIAS_SEMANA}
+        resumen = {codigo: {"clases": 0, "minutos": 0} for codigo in dias}
+        for horario, fila in zip(horarios, HorarioSemanaSerializer(horarios, many=True).data):
+            dias[horario.dia].append(fila)
+            resumen[horario.dia]["clases"] += 1
+            resumen[horario.dia]["minutos"] += (
+                (horario.hora_fin.hour * 60 + horario.hora_fin.minute)
+                - (horario.hora_inicio.hour * 60 + horario.hora_inicio.minute)
+            )
+        for carga in resumen.values():
+            carga["excede_limite"] = carga["clases"] > limite
+
+        return Response({
+            "dias": dias,
+            "resumen": resumen,
+            "total_clases": sum(carga["clases"] for carga in resumen.values()),
+        })
+
+# === Semestres e histórico de matrículas (solo lectura) ===
+class SemestreViewSet(LecturaReplicaMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Semestre.objects.all()
+    serializer_class = SemestreSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+class MatriculaHistoricaViewSet(LecturaReplicaMixin, viewsets.ReadOnlyModelViewSet):
+    serializer_class = MatriculaHistoricaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = MatriculaHistorica.objects.all()
+        # Un estudiante solo ve su propio histórico
+        if self.request.user.rol == 'ES':
+            queryset = queryset.filter(estudiante=self.request.user)
+        else:
+            estudiante = self.request.query_params.get('estudiante')
+            if estudiante:
+                queryset = queryset.filter(estudiante_id=estudiante)
+        semestre = self.request.query_params.get('semestre')
+        if semestre:
+            queryset = queryset.filter(semestre_id=semestre)
+        return queryset.order_by('-semestre_id', 'asignatura_id')
+
+# === Catálogo offline (snapshot + cambios incrementales) ===
+class CatalogoViewSet(LecturaReplicaMixin, viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=False, methods=['get'])
+    def snapshot(self, request):
+        # Archivo gzip ya comprimido: se sirve tal cual, sin serializar en el request
+        version, ruta = catalogo.snapshot_vigente()
+        etag = f'"catalogo-{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        response = FileResponse(open(ruta, 'rb'), content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+        response['ETag'] = etag
+        response['X-Catalogo-Version'] = str(version)
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def cambios(self, request):
+        try:
+            desde = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response(
+                {"error": "El parámetro since debe ser un número de versión"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if desde < catalogo.version_minima():
+            # Los cambios de esa época ya se compactaron
+            return Response(
+                {"error": "Versión demasiado antigua, descargue el snapshot completo"},
+                status=status.HTTP_410_GONE
+            )
+        return Response(catalogo.cambios_desde(desde))
+
+# === Analítica para coordinadores (resúmenes precalculados) ===
+class AnaliticaProgramaViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated, IsCoordinador]
+    lookup_value_regex = r'\d+'
+
+    def retrieve(self, request, pk=None):
+        coordinador = list(Programa.objects.filter(pk=pk).values_list('coordinador_id', flat=True))
+        if not coordinador:
+            return Response({"error": "Programa no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        if coordinador[0] != request.user.pk and not request.user.is_superuser:
+            return Response(
+                {"error": "Solo el coordinador del programa puede ver su analítica"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response(resumenes.leer(int(pk)))
+
+class _Eco:
+    # Pseudo-archivo para csv.writer: devuelve la línea en vez de escribirla
+    def write(self, valor):
+        return valor
+
+# === Reporte de conflictos de matrícula (lo genera el comando reporte_conflictos) ===
+class _PaginaConflictos(LimitOffsetPagination):
+    default_limit = 500
+    max_limit = 5000
+
+class ReporteConflictosViewSet(LecturaReplicaMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ReporteConflictos.objects.all()
+    serializer_class = ReporteConflictosSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCoordinador]
+    pagination_class = _PaginaConflictos
+
+    def filtrar_conflictos(self, reporte):
+        # ?tipo=CHO|DIA|TOT, ?estudiante=<id>, ?programa=<id>, ?multiprograma=1
+        params = self.request.query_params
+        conflictos = reporte.conflictos.order_by('estudiante_id', 'tipo', 'dia')
+        if params.get('tipo'):
+            conflictos = conflictos.filter(tipo=params['tipo'])
+        if params.get('multiprograma') in ('1', 'true'):
+            conflictos = conflictos.filter(programas__gt=1)
+        for parametro in ('estudiante', 'programa'):
+            if params.get(parametro) and not params[parametro].isdigit():
+                raise ValidationError({"error": f"El parámetro {parametro} debe ser un id"})
+        if params.get('estudiante'):
+            conflictos = conflictos.filter(estudiante_id=params['estudiante'])
+        if params.get('programa'):
+            # Estudiantes que cursan alguna asignatura del programa ese semestre
+            conflictos = conflictos.filter(estudiante_id__in=Matricula.objects.del_semestre(
+                reporte.semestre
+            ).filter(asignatura__programa_id=params['programa']).values('estudiante_id'))
+        return conflictos
+
+    @action(detail=True, methods=['get'])
+    def conflictos(self, request, pk=None):
+        conflictos = self.filtrar_conflictos(self.get_object()).select_related('estudiante')
+        pagina = self.paginate_queryset(conflictos)
+        return self.get_paginated_response(ConflictoMatriculaSerializer(pagina, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        # El reporte completo (con los mismos filtros) en CSV, transmitido por bloques
+        reporte = self.get_object()
+        conflictos = self.filtrar_conflictos(reporte).values_list(
+            'estudiante_id', 'estudiante__username', 'tipo', 'dia', 'asignaturas', 'programas'
+        )
+        codigos = dict(Asignatura.objects.values_list('pk', 'codigo'))
+        import csv  # solo lo usan las descargas
+        escritor = csv.writer(_Eco())
+
+        def filas():
+            yield escritor.writerow(['estudiante', 'usuario', 'tipo', 'dia', 'asignaturas', 'programas'])
+            for estudiante, usuario, tipo, dia, asignaturas, programas in conflictos.iterator(chunk_size=2000):
+                yield escritor.writerow([
+                    estudiante, usuario, tipo, dia,
+                    ' '.join(codigos.get(a, str(a)) for a in asignaturas), programas,
+                ])
+
+        response = StreamingHttpResponse(filas(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="conflictos-{reporte.semestre}-{reporte.pk}.csv"'
+        )
+        return response
+
+# === Views para Gestores ===
+class GestorHorarioViewSet(LecturaReplicaMixin, viewsets.ReadOnlyModelViewSet):
+    serializer_class = HorarioGestorSerializer
+    permission_classes = [permissions.IsAuthenticated, IsGestor]
+
+    def get_queryset(self):
+        return gestores.horarios_con_matriculados(self.request.user.pk)
+
+    def list(self, request, *args, **kwargs):
+        # Semana propia del gestor, agrupada por día; en caché por gestor
+        def construir(horarios):
+            dias = {codigo: [] for codigo, _ in Horario.DIAS_SEMANA}
+            minutos = 0
+            for horario, fila in zip(horarios, self.get_serializer(horarios, many=True).data):
+                dias[horario.dia].append(fila)
+                minutos += (
+                    (horario.hora_fin.hour * 60 + horario.hora_fin.minute)
+                    - (horario.hora_inicio.hour * 60 + horario.hora_inicio.minute)
+                )
+            return {
+                "dias": dias,
+                "total_clases": len(horarios),
+                "horas_semana": round(minutos / 60, 2),
+                "matriculados_total": sum(h.matriculados for h in horarios),
+            }
+
+        return Response(gestores.horario_gestor(request.user.pk, construir))
+
+    @action(detail=True, methods=['get'])
+    def estudiantes(self, request, pk=None):
+        # Lista de clase en CSV, transmitida por bloques sin cargarla en memoria
+        horario = self.get_object()
+        matriculas = Matricula.objects.vigentes().filter(
+            asignatura_id=horario.asignatura_id
+        ).order_by('estudiante__last_name', 'estudiante__first_name').values_list(
+            'estudiante_id', 'estudiante__username', 'estudiante__first_name',
+            'estudiante__last_name', 'estudiante__email', 'semestre_id',
+        )
+        import csv  # solo lo usan las descargas
+        escritor = csv.writer(_Eco())
+
+        def filas():
+            yield escritor.writerow(['id', 'usuario', 'nombres', 'apellidos', 'email', 'semestre'])
+            for fila in matriculas.iterator(chunk_size=2000):
+                yield escritor.writerow(fila)
+
+        response = StreamingHttpResponse(filas(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="clase-{horario.asignatura.codigo}-{horario.dia}.csv"'
+        )
+        return response
+
 # === Configuración Tema Oscuro ===
 class ConfiguracionUsuarioViewSet(viewsets.ModelViewSet):
     queryset = ConfiguracionUsuario.objects.all()
@@ -209,7 +482,7 @@ class ConfiguracionUsuarioViewSet(viewsets.ModelViewSet):
         return Response({"tema_oscuro": config.tema_oscuro})
 
 # === Buscador de Asignaturas ===
-class BuscadorViewSet(viewsets.ViewSet):
+class BuscadorViewSet(LecturaReplicaMixin, viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     @action(detail=False, methods=['get'])
@@ -225,7 +498,7 @@ class BuscadorViewSet(viewsets.ViewSet):
 
 # ... (code before AsignaturaViewSet)
 
-class AsignaturaViewSet(viewsets.ModelViewSet):
+class AsignaturaViewSet(LecturaReplicaMixin, viewsets.ModelViewSet):
     # These two lines should be indented by 4 spaces from the 'class' line
     queryset = Asignatura.objects.all()
     serializer_class = AsignaturaSerializer
@@ -242,7 +515,7 @@ class AsignaturaViewSet(viewsets.ModelViewSet):
 
 # ... (code after AsignaturaViewSet)
 
-class SalonViewSet(viewsets.ModelViewSet):
+class SalonViewSet(LecturaReplicaMixin, viewsets.ModelViewSet):
     queryset = Salon.objects.all()
     serializer_class = SalonSerializer
     # Add permissions if needed, e.g., permission_classes = [permissions.IsAuthenticated]
@@ -250,10 +523,6 @@ class SalonViewSet(viewsets.ModelViewSet):
 # ... rest of your views.py
 
 #Public
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
-
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def api_root_publica(request):
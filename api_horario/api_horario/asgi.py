@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_horario.settings')
 
 application = get_asgi_application()
+
+# Con servidores prefork (gunicorn --preload) cargar aquí la URLconf y las
+# vistas hace que los workers las hereden importadas en vez de pagarlas en
+# su primera petición.
+if os.environ.get('DJANGO_PRECARGAR_URLS') == '1':
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
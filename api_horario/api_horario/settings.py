@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,20 +32,27 @@ ALLOWED_HOSTS = ['*']
 
 # Application definition
 
+# El admin se puede omitir en los workers de la API (DJANGO_ADMIN=0) para
+# arrancar más rápido; se sigue sirviendo desde un despliegue aparte.
+ADMIN_HABILITADO = os.environ.get('DJANGO_ADMIN', '1') != '0'
+
+# rest_framework_simplejwt no va en INSTALLED_APPS: no usa modelos ni
+# plantillas, y registrarlo importaba django.test en cada arranque.
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    *(['django.contrib.admin'] if ADMIN_HABILITADO else []),
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'rest_framework_simplejwt',
     'api_app',
     'corsheaders'
 ]
 
 MIDDLEWARE = [
+    # Primero para medir la petición completa (api_app/metricas.py)
+    'api_app.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,7 +60,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware'
+    'corsheaders.middleware.CorsMiddleware',
+    'api_app.replicas.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_horario.urls'
@@ -81,14 +90,52 @@ WSGI_APPLICATION = 'api_horario.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'api_db_Udec',
-        'USER': 'postgres',
-        'PASSWORD': 'neider2303',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'api_db_Udec'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'neider2303'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        # Conexiones persistentes por worker (se revalidan antes de reutilizarse)
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Réplicas de lectura: DB_REPLICA_HOSTS=replica1.local,replica2.local
+# Mismas credenciales que la primaria; cada una queda como alias 'replica1', 'replica2'...
+for _i, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{_i}'] = {
+        **DATABASES['default'],
+        'HOST': _host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Pool de conexiones de psycopg 3 (requiere psycopg[pool]); incompatible con CONN_MAX_AGE
+if os.environ.get('DB_POOL'):
+    for _alias in DATABASES.values():
+        _alias['CONN_MAX_AGE'] = 0
+        _alias['OPTIONS'] = {'pool': {'min_size': 2, 'max_size': int(os.environ['DB_POOL'])}}
+
+# Desarrollo/pruebas sin Postgres: DB_MOTOR=sqlite usa un archivo SQLite y una
+# réplica que apunta al mismo archivo, para ejercitar el enrutamiento
+if os.environ.get('DB_MOTOR') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        },
+    }
+    DATABASES['replica1'] = {
+        **DATABASES['default'],
+        'OPTIONS': {'init_command': 'PRAGMA read_uncommitted = 1'},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api_app.replicas.ReplicaRouter']
+# Segundos que un usuario lee de la primaria tras escribir (leer sus propios cambios)
+REPLICA_FIJACION_SEGUNDOS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -113,6 +160,45 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # Token bucket por rol (api_app/admision.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api_app.admision.RolThrottle',
+    ],
+}
+
+# Reglas de horario por defecto (api_app/reglas.py). Cada Programa puede
+# sobrescribirlas con una fila de ReglasPrograma.
+REGLAS_HORARIO = {
+    'DURACION_MIN': 120,  # minutos
+    'DURACION_MAX': 180,
+    'HORA_APERTURA': '07:00',
+    'HORA_CIERRE': '18:00',
+    'DIAS': ['LUN', 'MAR', 'MIE', 'JUE', 'VIE'],
+    'MAX_CLASES_GESTOR_DIA': 4,
+    'MAX_ASIGNATURAS_ESTUDIANTE': 8,
+    'MAX_CLASES_ESTUDIANTE_DIA': 4,  # horario del estudiante y reporte de conflictos
+}
+
+# Control de admisión para picos de matrícula (api_app/admision.py).
+# Con varios workers usar CacheBackend sobre una caché compartida (Redis).
+ADMISION = {
+    'BACKEND': os.environ.get('ADMISION_BACKEND', 'api_app.admision.MemoriaBackend'),
+    'ROLES': {
+        # rol: {'usuario': (capacidad, tokens/seg), 'rol': (capacidad, tokens/seg)}
+        'ES': {'usuario': (20, 2), 'rol': (2000, 400)},
+        'GC': {'usuario': (60, 10), 'rol': (500, 100)},
+        'CO': {'usuario': (60, 10), 'rol': (500, 100)},
+        None: {'usuario': (10, 1), 'rol': (200, 50)},
+    },
+    # /api/token/: por nombre de usuario (contra fuerza bruta) y por IP, holgado
+    # porque el campus sale a internet por pocas IPs
+    'LOGIN': {'usuario': (10, 0.2), 'ip': (500, 50)},
+    # Peticiones simultáneas por clase de endpoint (ConcurrenciaMixin.clase_admision)
+    'CONCURRENCIA': {
+        'matricula': 50,
+        'horario_estudiante': 100,
+    },
+    'REINTENTO_SATURADO': 2,
 }
 
 
@@ -140,4 +226,29 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'api_app.Usuario'
-CORS_ALLOW_ALL_ORIGINS= True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS= True
+
+# Notificaciones automáticas por cambios de Horario (api_app/notificaciones.py)
+# Entregadas por: python manage.py entregar_notificaciones_horario (cron)
+NOTIFICACION_HORARIO_VENTANA = 60         # segundos sin cambios antes de entregar
+NOTIFICACION_HORARIO_ESPERA_MAXIMA = 300  # segundos máximos de espera por ráfaga
+NOTIFICACION_HORARIO_LOTE = 500           # filas por bulk_create
+
+
+# Métricas Prometheus en /metrics (api_app/metricas.py). Todos los workers
+# deben compartir el directorio; vaciarlo al redesplegar.
+METRICAS_DIR = os.environ.get('METRICAS_DIR', BASE_DIR / 'metricas')
+METRICAS_INTERVALO = 5  # segundos entre volcados de cada hilo
+
+# Catálogo offline (api_app/catalogo.py): snapshot gzip y cambios incrementales
+CATALOGO_SNAPSHOT_DIR = os.environ.get('CATALOGO_SNAPSHOT_DIR', BASE_DIR / 'snapshots')
+CATALOGO_SNAPSHOT_INTERVALO = 60  # segundos mínimos entre regeneraciones automáticas
+CATALOGO_RETENCION_CAMBIOS = 30  # días que se guardan los cambios ya incluidos en un snapshot
+
+# Idempotency-Key en POST de creación (api_app/idempotencia.py)
+IDEMPOTENCIA_TTL = 24 * 3600   # segundos que se reproduce la primera respuesta
+IDEMPOTENCIA_ESPERA = 10       # segundos que un duplicado espera al original en curso
+
+# Arranque en frío (python manage.py medir_arranque): mediana máxima en ms
+# desde el import de wsgi.py/asgi.py hasta la primera respuesta
+ARRANQUE_PRESUPUESTO_MS = int(os.environ.get('ARRANQUE_PRESUPUESTO_MS', 1500))
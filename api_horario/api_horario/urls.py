@@ -1,14 +1,21 @@
 # api_horario/api_horario/urls.py
 
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
+from api_app.metricas import metrics_view
 
 urlpatterns = [
-    # Ruta para el panel de administración de Django
-    path('admin/', admin.site.urls),
-
     # Incluye todas las rutas definidas en api_app/urls.py bajo el prefijo 'api/'
     # Esto significa que cualquier URL definida en api_app/urls.py,
     # por ejemplo, 'usuarios/', será accesible como 'api/usuarios/'.
     path('api/', include('api_app.urls')),
-]
\ No newline at end of file
+
+    # Métricas para Prometheus (texto plano, agregadas entre workers)
+    path('metrics', metrics_view, name='metrics'),
+]
+
+if settings.ADMIN_HABILITADO:
+    from django.contrib import admin
+
+    # Ruta para el panel de administración de Django
+    urlpatterns.append(path('admin/', admin.site.urls))